@@ -1,345 +1,485 @@
-import sys
-import openpyxl
-import requests
-from typing import List
-
-from PyQt6.QtWidgets import (
-    QApplication,
-    QWidget,
-    QVBoxLayout,
-    QLabel,
-    QLineEdit,
-    QPushButton,
-    QFileDialog,
-    QMessageBox,
-    QProgressBar,
-    QPlainTextEdit,
-    QHBoxLayout,
-)
-from PyQt6.QtCore import QThread, pyqtSignal
-from PyQt6.QtGui import QTextDocument
-
-from request_thread import RequestThread
-from api_request import APIRequest
-from data_processor import DataProcessor
-from token_provider import TokenProvider
-
-
-class APIRequest:
-    def __init__(self, access_token: str):
-        self.access_token = access_token
-
-    def send_request(self, url: str) -> bool:
-        max_retries = 3
-        headers = {"Authorization": f"Bearer {self.access_token}"}
-
-        attempts = 0
-        success = False
-        while not success and attempts < max_retries:
-            try:
-                response = requests.put(url, headers=headers)
-                if response.status_code >= 301:
-                    raise requests.exceptions.RequestException(f"Error response: {response.status_code}")
-                success = True
-            except requests.exceptions.RequestException as e:
-                attempts += 1
-
-        return success
-
-
-class DataProcessor:
-    def __init__(self, event_id: str):
-        self.event_id = event_id
-
-    def generate_links(self, data_dict: dict) -> List[str]:
-        links = []
-        for key, value_list in data_dict.items():
-            for value in value_list:
-                link = f"https://api.bizzabo.com/v1/events/{self.event_id}/agenda/sessions/{key}/registrations/{value}"
-                links.append(link)
-        return links
-
-    def process_excel_data(self, file_path: str) -> dict:
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook.active
-
-        data_dict = {}
-
-        for col in sheet.columns:
-            key = col[0].value
-            if key is None:
-                continue
-
-            key_int = int(key)
-
-            values = []
-            for cell in col[1:]:
-                if cell.value is None:
-                    continue
-
-                if isinstance(cell.value, int):
-                    values.append(cell.value)
-                else:
-                    value_str = format(cell.value, '.0f') if cell.value.is_integer() else format(cell.value,
-                                                                                                 '.{}g'.format(
-                                                                                                     cell.number_format.count(
-                                                                                                         '0')))
-                    values.append(value_str)
-            data_dict[key_int] = values
-        return data_dict
-
-
-class TokenProvider:
-    @staticmethod
-    def get_access_token(client_id: str, client_secret: str, account_id: str) -> str:
-        url = 'https://auth.bizzabo.com/oauth/token'
-
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-
-        payload = {
-            'grant_type': 'client_credentials',
-            'client_id': client_id,
-            'client_secret': client_secret,
-            'audience': 'https://api.bizzabo.com/api',
-            'account_id': account_id
-        }
-
-        response = requests.post(url, headers=headers, data=payload)
-
-        if response.status_code == 200:
-            access_token = response.json()['access_token']
-            return access_token
-        else:
-            return ''
-
-
-class APIApp(QWidget):
-    def __init__(self):
-        super().__init__()
-        self.init_ui()
-        self.request_thread = None
-        self.delete_request_thread = None
-        self.running = False
-
-    def init_ui(self):
-        layout = QVBoxLayout()
-        self.setFixedSize(400, 700)
-
-        # Client ID
-        self.client_id_label = QLabel("Client ID:")
-        self.client_id = QLineEdit()
-        layout.addWidget(self.client_id_label)
-        layout.addWidget(self.client_id)
-        self.client_id.setText("")
-
-        # Client Secret
-        self.client_secret_label = QLabel("Client Secret:")
-        self.client_secret = QLineEdit()
-        layout.addWidget(self.client_secret_label)
-        layout.addWidget(self.client_secret)
-        self.client_secret.setText("")
-
-        # Account ID
-        self.account_id_label = QLabel("Account ID:")
-        self.account_id = QLineEdit()
-        layout.addWidget(self.account_id_label)
-        layout.addWidget(self.account_id)
-        self.account_id.setText("")
-
-        # Event ID
-        self.event_id_label = QLabel("Event ID:")
-        self.event_id = QLineEdit()
-        layout.addWidget(self.event_id_label)
-        layout.addWidget(self.event_id)
-        self.event_id.setText("")
-
-        # Excel File
-        self.excel_file_label = QLabel("Excel File:")
-        self.excel_file = QLineEdit()
-        self.excel_file.setEnabled(False)
-        layout.addWidget(self.excel_file_label)
-        layout.addWidget(self.excel_file)
-
-        self.browse_button = QPushButton("Browse", self)
-        self.browse_button.setFixedWidth(100)
-        self.browse_button.setFixedHeight(30)
-        self.browse_button.clicked.connect(self.browse_file)
-        layout.addWidget(self.browse_button)
-
-        # Generated Links
-        self.links_label = QLabel("Generated Links:")
-        self.links_output = QPlainTextEdit()
-        self.links_output.setReadOnly(True)
-        self.links_output.setMinimumHeight(100)
-        self.links_output.setMinimumWidth(300)
-        layout.addWidget(self.links_label)
-        layout.addWidget(self.links_output)
-
-        # Progress Bar
-        self.progress_bar = QProgressBar(self)
-        self.progress_bar.setVisible(False)
-        self.progress_bar.setStyleSheet("QProgressBar { margin: 0px; }")
-        layout.addStretch(1)
-        layout.addWidget(self.progress_bar)
-        layout.addStretch(1)
-        self.progress_bar.setMinimumWidth(300)
-        self.progress_bar.setMinimumHeight(40)
-
-        # Execute button
-        self.execute_button = QPushButton("Add registrations", self)
-        self.execute_button.clicked.connect(self.execute)
-        self.execute_button.setMinimumHeight(50)
-        self.execute_button.setMinimumWidth(100)
-        layout.addWidget(self.execute_button)
-
-        # Delete registration button
-        self.delete_reg_button = QPushButton("Remove registrations", self)
-        self.delete_reg_button.clicked.connect(self.delete_registration)
-        self.delete_reg_button.setMinimumHeight(50)
-        self.delete_reg_button.setMinimumWidth(100)
-        layout.addWidget(self.delete_reg_button)
-
-        # Cancel button
-        self.cancel_button = QPushButton("Cancel", self)
-        self.cancel_button.clicked.connect(self.cancel)
-        self.cancel_button.setMinimumHeight(50)
-        self.cancel_button.setMinimumWidth(100)
-        self.cancel_button.setVisible(False)
-        layout.addWidget(self.cancel_button)
-
-        self.setLayout(layout)
-        self.setWindowTitle('Session Bulk Registration')
-
-    def browse_file(self):
-        file_name, _ = QFileDialog.getOpenFileName(self, "Select Excel File", "",
-                                                   "Excel Files (*.xlsx *.xls);;All Files (*)")
-        if file_name:
-            self.excel_file.setText(file_name)
-
-    def execute(self):
-        if not self.running:
-            if not self.client_id.text() or not self.client_secret.text() or not self.account_id.text() or not self.event_id.text() or not self.excel_file.text():
-                QMessageBox.warning(self, "Warning", "Please fill in all fields.")
-                return
-
-            access_token = TokenProvider.get_access_token(self.client_id.text(), self.client_secret.text(),
-                                                          self.account_id.text())
-            if access_token:
-                data_processor = DataProcessor(self.event_id.text())
-                data_dict = data_processor.process_excel_data(self.excel_file.text())
-                url_list = data_processor.generate_links(data_dict)
-
-                self.progress_bar.setVisible(True)
-                self.delete_reg_button.setEnabled(False)
-                self.progress_bar.setMaximum(len(url_list))
-
-                # Disable execute button and set its text to "Cancel"
-                self.execute_button.setText("Cancel")
-                self.running = True
-
-                # Run send_requests in a separate thread
-                self.request_thread = RequestThread(access_token, url_list)
-                self.request_thread.progress_signal.connect(self.update_progress_bar)
-                self.request_thread.link_signal.connect(self.update_links)
-                self.request_thread.finished.connect(self.on_requests_finished)
-                self.request_thread.start()
-
-            else:
-                QMessageBox.critical(self, "Error", "Failed to obtain access token.")
-        else:
-            self.cancel()
-
-    def delete_registration(self):
-        if not self.running:
-            if not self.client_id.text() or not self.client_secret.text() or not self.account_id.text() or not self.event_id.text() or not self.excel_file.text():
-                QMessageBox.warning(self, "Warning", "Please fill in all fields.")
-                return
-
-            access_token = TokenProvider.get_access_token(self.client_id.text(), self.client_secret.text(),
-                                                          self.account_id.text())
-            if access_token:
-                data_processor = DataProcessor(self.event_id.text())
-                data_dict = data_processor.process_excel_data(self.excel_file.text())
-                url_list = data_processor.generate_links(data_dict)
-
-                self.progress_bar.setVisible(True)
-                self.execute_button.setEnabled(False)
-                self.progress_bar.setMaximum(len(url_list))
-
-                # Disable delete button and set its text to "Cancel"
-                self.delete_reg_button.setText("Cancel")
-                self.running = True
-
-                # Run send_requests in a separate thread
-                self.delete_request_thread = RequestThread(access_token, url_list, request_method="DELETE")
-                self.delete_request_thread.progress_signal.connect(self.update_progress_bar)
-                self.delete_request_thread.link_signal.connect(self.update_links)
-                self.delete_request_thread.finished.connect(self.on_delete_requests_finished)
-                self.delete_request_thread.start()
-
-            else:
-                QMessageBox.critical(self, "Error", "Failed to obtain access token.")
-        else:
-            self.cancel_delete()
-
-    def update_links(self, link, response_code, response_text):
-        if 200 <= response_code < 300:
-            message = f"<span style='color:green;'><br>Success! (Code: {response_code})</span>"
-        else:
-            message = f"<span style='color:red;'><br>Error: {response_code} - {response_text}</span>"
-
-        document = QTextDocument()
-        document.setHtml(f"{link} {message}")
-        self.links_output.appendHtml(document.toHtml())
-
-        # Scroll to the bottom of the widget
-        scrollbar = self.links_output.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
-
-    def update_progress_bar(self, value):
-        self.progress_bar.setValue(value)
-
-    def on_requests_finished(self):
-        QMessageBox.information(self, "Success", "Sending API requests is finished.")
-        self.reset_progress_bar()
-        self.delete_reg_button.setEnabled(True)
-        self.execute_button.setText("Add registrations")
-        self.running = False
-        self.request_thread.failed_requests.save_to_excel(self)
-
-    def reset_progress_bar(self):
-        self.progress_bar.setValue(0)
-        self.progress_bar.setVisible(False)
-
-    def cancel(self):
-        # Disable the cancel button and set its text back to "Execute"
-        self.execute_button.setText("Add registrations")
-        self.running = False
-
-        # Stop the request thread
-        if self.request_thread is not None:
-            self.request_thread.cancel()
-            self.request_thread.wait()
-
-    def on_delete_requests_finished(self):
-        QMessageBox.information(self, "Success", "Sending API requests is finished.")
-        self.reset_progress_bar()
-        self.delete_reg_button.setText("Remove registrations")
-        self.execute_button.setEnabled(True)
-        self.running = False
-        self.delete_request_thread.failed_requests.save_to_excel(self)
-
-    def cancel_delete(self):
-        # Disable the cancel button and set its text back to "Delete registration"
-        self.delete_reg_button.setText("Remove registrations")
-        self.running = False
-        self.execute_button.setEnabled(True)
-
-        # Stop the delete request thread
-        if self.delete_request_thread is not None:
-            self.delete_request_thread.cancel()
-            self.delete_request_thread.wait()
-
-
+import html
+import os
+
+from PyQt6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QFileDialog,
+    QMessageBox,
+    QProgressBar,
+    QPlainTextEdit,
+    QHBoxLayout,
+    QCheckBox,
+    QSpinBox,
+)
+
+
+class APIApp(QWidget):
+    MAX_LOG_BLOCKS = 2000
+    MAX_FAILURES_PER_BATCH = 50
+
+    def __init__(self):
+        super().__init__()
+        self.init_ui()
+        self.token_manager = None
+        self.transport = None
+        self.request_thread = None
+        self.delete_request_thread = None
+        self.plan_request_thread = None
+        self.active_thread = None
+        self.running = False
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        self.setFixedSize(400, 760)
+
+        # Client ID
+        self.client_id_label = QLabel("Client ID (several API clients: comma-separated):")
+        self.client_id = QLineEdit()
+        layout.addWidget(self.client_id_label)
+        layout.addWidget(self.client_id)
+        self.client_id.setText("")
+
+        # Client Secret
+        self.client_secret_label = QLabel("Client Secret (same order as the IDs):")
+        self.client_secret = QLineEdit()
+        layout.addWidget(self.client_secret_label)
+        layout.addWidget(self.client_secret)
+        self.client_secret.setText("")
+
+        # Account ID
+        self.account_id_label = QLabel("Account ID:")
+        self.account_id = QLineEdit()
+        layout.addWidget(self.account_id_label)
+        layout.addWidget(self.account_id)
+        self.account_id.setText("")
+
+        # Event ID
+        self.event_id_label = QLabel("Event ID:")
+        self.event_id = QLineEdit()
+        layout.addWidget(self.event_id_label)
+        layout.addWidget(self.event_id)
+        self.event_id.setText("")
+
+        # Excel File
+        self.excel_file_label = QLabel("Input File (Excel, CSV, TSV or JSONL):")
+        self.excel_file = QLineEdit()
+        self.excel_file.setEnabled(False)
+        layout.addWidget(self.excel_file_label)
+        layout.addWidget(self.excel_file)
+
+        self.browse_button = QPushButton("Browse", self)
+        self.browse_button.setFixedWidth(100)
+        self.browse_button.setFixedHeight(30)
+        self.browse_button.clicked.connect(self.browse_file)
+        layout.addWidget(self.browse_button)
+
+        # Generated Links
+        self.links_label = QLabel("Generated Links:")
+        self.links_output = QPlainTextEdit()
+        self.links_output.setReadOnly(True)
+        self.links_output.setMinimumHeight(100)
+        self.links_output.setMinimumWidth(300)
+        self.links_output.setMaximumBlockCount(self.MAX_LOG_BLOCKS)
+        layout.addWidget(self.links_label)
+        layout.addWidget(self.links_output)
+
+        # Adaptive concurrency
+        self.adaptive_concurrency = QCheckBox("Adaptive concurrency", self)
+        layout.addWidget(self.adaptive_concurrency)
+        self.concurrency_label = QLabel("")
+        layout.addWidget(self.concurrency_label)
+
+        # Rate limit
+        rate_limit_layout = QHBoxLayout()
+        rate_limit_layout.addWidget(QLabel("Rate limit (requests/s, 0 = off):"))
+        self.rate_limit = QSpinBox(self)
+        self.rate_limit.setRange(0, 1000)
+        rate_limit_layout.addWidget(self.rate_limit)
+        layout.addLayout(rate_limit_layout)
+
+        # Resume
+        self.resume = QCheckBox("Resume previous run", self)
+        layout.addWidget(self.resume)
+
+        # Diff against server
+        self.diff_with_server = QCheckBox("Only send changes (compare with server)", self)
+        layout.addWidget(self.diff_with_server)
+
+        # Progress Bar
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setVisible(False)
+        self.progress_bar.setStyleSheet("QProgressBar { margin: 0px; }")
+        self.throughput_label = QLabel("")
+        progress_layout = QHBoxLayout()
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.throughput_label)
+        layout.addStretch(1)
+        layout.addLayout(progress_layout)
+        layout.addStretch(1)
+        self.progress_bar.setMinimumWidth(230)
+        self.progress_bar.setMinimumHeight(40)
+
+        # Execute button
+        self.execute_button = QPushButton("Add registrations", self)
+        self.execute_button.clicked.connect(self.execute)
+        self.execute_button.setMinimumHeight(50)
+        self.execute_button.setMinimumWidth(100)
+        layout.addWidget(self.execute_button)
+
+        # Delete registration button
+        self.delete_reg_button = QPushButton("Remove registrations", self)
+        self.delete_reg_button.clicked.connect(self.delete_registration)
+        self.delete_reg_button.setMinimumHeight(50)
+        self.delete_reg_button.setMinimumWidth(100)
+        layout.addWidget(self.delete_reg_button)
+
+        # Job plan button: each row of the input adds, removes or moves a ticket
+        self.plan_button = QPushButton("Run job plan", self)
+        self.plan_button.clicked.connect(self.run_plan)
+        self.plan_button.setMinimumHeight(50)
+        self.plan_button.setMinimumWidth(100)
+        layout.addWidget(self.plan_button)
+
+        # Pause/resume button, shown while a job runs
+        self.pause_button = QPushButton("Pause", self)
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.pause_button.setMinimumHeight(50)
+        self.pause_button.setMinimumWidth(100)
+        self.pause_button.setVisible(False)
+        layout.addWidget(self.pause_button)
+
+        # Cancel button
+        self.cancel_button = QPushButton("Cancel", self)
+        self.cancel_button.clicked.connect(self.cancel)
+        self.cancel_button.setMinimumHeight(50)
+        self.cancel_button.setMinimumWidth(100)
+        self.cancel_button.setVisible(False)
+        layout.addWidget(self.cancel_button)
+
+        self.setLayout(layout)
+        self.setWindowTitle('Session Bulk Registration')
+
+    def browse_file(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self, "Select Input File", "",
+            "Input Files (*.xlsx *.csv *.tsv *.jsonl);;Excel Files (*.xlsx);;CSV/TSV Files (*.csv *.tsv);;"
+            "JSON Lines (*.jsonl);;All Files (*)")
+        if file_name:
+            self.excel_file.setText(file_name)
+
+    def execute(self):
+        if not self.running:
+            if not self.validate_inputs():
+                return
+
+            self.progress_bar.setVisible(True)
+            self.delete_reg_button.setEnabled(False)
+            self.plan_button.setEnabled(False)
+
+            # Disable execute button and set its text to "Cancel"
+            self.execute_button.setText("Cancel")
+            self.running = True
+
+            # Run send_requests in a separate thread
+            self.request_thread = self.create_request_thread("PUT")
+            self.request_thread.progress_signal.connect(self.update_progress_bar)
+            self.request_thread.concurrency_signal.connect(self.update_concurrency)
+            self.request_thread.metrics_signal.connect(self.update_throughput)
+            self.request_thread.results_signal.connect(self.update_links)
+            self.request_thread.finished.connect(self.on_requests_finished)
+            self.request_thread.start()
+            self.show_pause_button(self.request_thread)
+        else:
+            self.cancel()
+
+    def delete_registration(self):
+        if not self.running:
+            if not self.validate_inputs():
+                return
+
+            self.progress_bar.setVisible(True)
+            self.execute_button.setEnabled(False)
+            self.plan_button.setEnabled(False)
+
+            # Disable delete button and set its text to "Cancel"
+            self.delete_reg_button.setText("Cancel")
+            self.running = True
+
+            # Run send_requests in a separate thread
+            self.delete_request_thread = self.create_request_thread("DELETE")
+            self.delete_request_thread.progress_signal.connect(self.update_progress_bar)
+            self.delete_request_thread.concurrency_signal.connect(self.update_concurrency)
+            self.delete_request_thread.metrics_signal.connect(self.update_throughput)
+            self.delete_request_thread.results_signal.connect(self.update_links)
+            self.delete_request_thread.finished.connect(self.on_delete_requests_finished)
+            self.delete_request_thread.start()
+            self.show_pause_button(self.delete_request_thread)
+        else:
+            self.cancel_delete()
+
+    def validate_inputs(self):
+        if not self.client_id.text() or not self.client_secret.text() or not self.account_id.text() or not self.event_id.text() or not self.excel_file.text():
+            QMessageBox.warning(self, "Warning", "Please fill in all fields.")
+            return False
+        if len(self.client_ids()) != len(self.client_secrets()):
+            QMessageBox.warning(self, "Warning", "Enter one client secret for each client ID.")
+            return False
+        return True
+
+    def client_ids(self):
+        return [value.strip() for value in self.client_id.text().split(",") if value.strip()]
+
+    def client_secrets(self):
+        return [value.strip() for value in self.client_secret.text().split(",") if value.strip()]
+
+    def run_plan(self):
+        if not self.running:
+            if not self.validate_inputs():
+                return
+
+            self.progress_bar.setVisible(True)
+            self.execute_button.setEnabled(False)
+            self.delete_reg_button.setEnabled(False)
+
+            # Adds, removals and moves all go through one thread, session and token
+            self.plan_button.setText("Cancel")
+            self.running = True
+
+            self.plan_request_thread = self.create_request_thread("PLAN")
+            self.plan_request_thread.progress_signal.connect(self.update_progress_bar)
+            self.plan_request_thread.concurrency_signal.connect(self.update_concurrency)
+            self.plan_request_thread.metrics_signal.connect(self.update_throughput)
+            self.plan_request_thread.results_signal.connect(self.update_links)
+            self.plan_request_thread.finished.connect(self.on_plan_requests_finished)
+            self.plan_request_thread.start()
+            self.show_pause_button(self.plan_request_thread)
+        else:
+            self.cancel_plan()
+
+    def get_token_manager(self):
+        # Created with the first job, like the transport below; tokens stay cached
+        # across the jobs of this window.
+        from token_provider import TokenManager
+
+        if self.token_manager is None:
+            self.token_manager = TokenManager()
+        return self.token_manager
+
+    def get_transport(self):
+        # aiohttp and the dispatcher are only loaded once the first job starts, so
+        # they don't count towards the time it takes the window to appear.
+        from transport import HttpTransport
+
+        if self.transport is None:
+            self.transport = HttpTransport()
+        return self.transport
+
+    def create_request_thread(self, request_method):
+        from credential_pool import credential_pool_for
+        from job_manifest import JobSpec, JobStream
+        from metrics import RequestMetrics
+        from rate_limiter import rate_limiter_for
+        from request_thread import RequestThread
+
+        # Nothing blocks the UI here: the input is read on its own thread and the
+        # request thread fetches the tokens, so both overlap and sending starts with
+        # the first rows read. Every run journals its completed requests in the app
+        # data folder; a resumed run appends to that journal and skips what it
+        # already lists as done.
+        clients = list(zip(self.client_ids(), self.client_secrets()))
+        credentials = credential_pool_for(self.get_token_manager(), clients, self.account_id.text())
+        job = JobSpec(self.event_id.text(), self.excel_file.text(), request_method)
+        options = {
+            "resume": self.resume.isChecked(),
+            "diff": self.diff_with_server.isChecked(),
+            "transport": self.get_transport() if self.diff_with_server.isChecked() else None,
+        }
+        stream = JobStream(job, credentials.credentials[0].token_source, options)
+
+        # Shared with other jobs and app instances working on the same account.
+        rate_limiter = rate_limiter_for(self.account_id.text(), self.rate_limit.value(), shared=True)
+
+        # Like the CLI's --metrics-output: .json, or .prom for Prometheus text.
+        metrics_path = os.environ.get("SESSIONREG_METRICS_OUTPUT") or None
+        request_thread = RequestThread(None, stream.feed, stream.format_link, request_method=request_method,
+                                       adaptive_concurrency=self.adaptive_concurrency.isChecked(),
+                                       credentials=credentials, transport=self.get_transport(),
+                                       journal=stream.journal, metrics=RequestMetrics(), metrics_path=metrics_path,
+                                       rate_limiter=rate_limiter)
+        request_thread.rows_read_signal.connect(self.update_rows_read)
+        request_thread.message_signal.connect(self.links_output.appendPlainText)
+        stream.on_rows_read = request_thread.rows_read_signal.emit
+        stream.on_message = request_thread.message_signal.emit
+        for message in stream.messages:
+            self.links_output.appendPlainText(message)
+
+        # A busy bar until the first batch of rows has been read.
+        self.progress_bar.setMaximum(0)
+        stream.start()
+        return request_thread
+
+    def update_links(self, results):
+        # One append per batch: failures are shown in full (up to a cap), successes
+        # are summarised, and the view itself is capped to MAX_LOG_BLOCKS blocks.
+        success_count = 0
+        lines = []
+        for session_id, ticket_id, response_code, response_text in results:
+            if 200 <= response_code < 300:
+                success_count += 1
+            elif len(lines) < self.MAX_FAILURES_PER_BATCH:
+                lines.append(f"Session {session_id}, ticket {html.escape(str(ticket_id))} <span style='color:red;'><br>Error: {response_code} - "
+                             f"{html.escape(response_text)}</span>")
+
+        hidden_failures = len(results) - success_count - len(lines)
+        if hidden_failures:
+            lines.append(f"<span style='color:red;'>... and {hidden_failures} more errors</span>")
+        if success_count:
+            lines.append(f"<span style='color:green;'>Success! {success_count} requests completed</span>")
+        self.links_output.appendHtml("<br>".join(lines))
+
+        # Scroll to the bottom of the widget
+        scrollbar = self.links_output.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def update_progress_bar(self, value):
+        self.progress_bar.setValue(value)
+
+    def update_rows_read(self, total, finished):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setFormat("%v / %m" if finished else "%v / %m+")
+
+    def update_throughput(self, requests_per_second, p95):
+        self.throughput_label.setText(f"{requests_per_second:.0f} req/s\np95 {p95 * 1000:.0f} ms")
+
+    def update_concurrency(self, limit):
+        self.concurrency_label.setText(f"Concurrent requests: {limit}")
+
+    def show_pool_stats(self):
+        if self.transport is None:
+            return
+        stats = self.transport.stats()
+        self.links_output.appendPlainText(
+            f"Connections: {stats['open']} open, {stats['idle']} idle, "
+            f"{stats['created']} created, {stats['reused']} reused")
+
+    def closeEvent(self, event):
+        if self.active_thread is not None:
+            self.active_thread.cancel(deadline=1.0)
+            self.active_thread.wait()
+        if self.transport is not None:
+            self.transport.close()
+        super().closeEvent(event)
+
+    def on_requests_finished(self):
+        self.show_pool_stats()
+        self.show_finished_message(self.request_thread)
+        self.reset_progress_bar()
+        self.hide_pause_button()
+        self.delete_reg_button.setEnabled(True)
+        self.plan_button.setEnabled(True)
+        self.execute_button.setText("Add registrations")
+        self.execute_button.setEnabled(True)
+        self.running = False
+        self.save_failed_requests(self.request_thread)
+
+    def show_finished_message(self, request_thread):
+        self.show_client_stats(request_thread)
+        if request_thread.error:
+            QMessageBox.critical(self, "Error", request_thread.error)
+        elif request_thread.cancelled:
+            QMessageBox.information(self, "Cancelled", "Sending API requests was cancelled.")
+        else:
+            QMessageBox.information(self, "Success", "Sending API requests is finished.")
+
+    def show_client_stats(self, request_thread):
+        from credential_pool import format_stats, format_unavailable
+
+        credentials = request_thread.credentials
+        if len(credentials) > 1 or credentials.unavailable:
+            for line in format_stats(credentials.stats()) + format_unavailable(credentials.unavailable):
+                self.links_output.appendPlainText(line)
+
+    def show_pause_button(self, request_thread):
+        self.active_thread = request_thread
+        self.pause_button.setText("Pause")
+        self.pause_button.setEnabled(True)
+        self.pause_button.setVisible(True)
+
+    def hide_pause_button(self):
+        self.active_thread = None
+        self.pause_button.setVisible(False)
+
+    def toggle_pause(self):
+        if self.active_thread is None:
+            return
+        if self.active_thread.paused:
+            self.active_thread.resume()
+            self.pause_button.setText("Pause")
+        else:
+            self.active_thread.pause()
+            self.pause_button.setText("Resume")
+
+    def save_failed_requests(self, request_thread):
+        try:
+            request_thread.failed_requests.save_report(self)
+        finally:
+            request_thread.failed_requests.discard()
+
+    def reset_progress_bar(self):
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("%p%")
+        self.progress_bar.setVisible(False)
+        self.throughput_label.setText("")
+
+    def cancel(self):
+        # Returns immediately: the engine stops dispatching, gives in-flight requests
+        # until its cancel deadline, and on_requests_finished restores the buttons.
+        if self.request_thread is not None:
+            self.execute_button.setText("Cancelling...")
+            self.execute_button.setEnabled(False)
+            self.pause_button.setEnabled(False)
+            self.request_thread.cancel()
+
+    def on_delete_requests_finished(self):
+        self.show_pool_stats()
+        self.show_finished_message(self.delete_request_thread)
+        self.reset_progress_bar()
+        self.hide_pause_button()
+        self.delete_reg_button.setText("Remove registrations")
+        self.delete_reg_button.setEnabled(True)
+        self.execute_button.setEnabled(True)
+        self.plan_button.setEnabled(True)
+        self.running = False
+        self.save_failed_requests(self.delete_request_thread)
+
+    def cancel_delete(self):
+        if self.delete_request_thread is not None:
+            self.delete_reg_button.setText("Cancelling...")
+            self.delete_reg_button.setEnabled(False)
+            self.pause_button.setEnabled(False)
+            self.delete_request_thread.cancel()
+
+    def on_plan_requests_finished(self):
+        self.show_pool_stats()
+        self.show_finished_message(self.plan_request_thread)
+        self.reset_progress_bar()
+        self.hide_pause_button()
+        self.plan_button.setText("Run job plan")
+        self.plan_button.setEnabled(True)
+        self.execute_button.setEnabled(True)
+        self.delete_reg_button.setEnabled(True)
+        self.running = False
+        self.save_failed_requests(self.plan_request_thread)
+
+    def cancel_plan(self):
+        if self.plan_request_thread is not None:
+            self.plan_button.setText("Cancelling...")
+            self.plan_button.setEnabled(False)
+            self.pause_button.setEnabled(False)
+            self.plan_request_thread.cancel()
+
+
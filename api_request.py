@@ -1,3 +0,0 @@
-class APIRequest:
-    def __init__(self, access_token: str):
-        self.access_token = access_token
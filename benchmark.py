@@ -0,0 +1,248 @@
+import argparse
+import csv
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# Throughput may drop and p99 may rise by this fraction before a run counts as a
+# regression against the baseline.
+DEFAULT_TOLERANCE = 0.2
+
+
+def iter_input_rows(rows: int, sessions: int):
+    yield [500000 + session for session in range(sessions)]
+    for row in range((rows + sessions - 1) // sessions):
+        first = row * sessions
+        yield [1000000 + first + column if first + column < rows else None for column in range(sessions)]
+
+
+def generate_input(path: str, rows: int, sessions: int = 20):
+    if path.endswith(".xlsx"):
+        import openpyxl
+
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        for values in iter_input_rows(rows, sessions):
+            sheet.append(values)
+        workbook.save(path)
+    elif path.endswith(".jsonl"):
+        header = None
+        with open(path, "w", encoding="utf-8") as input_file:
+            for values in iter_input_rows(rows, sessions):
+                if header is None:
+                    header = values
+                    continue
+                for session_id, ticket_id in zip(header, values):
+                    if ticket_id is not None:
+                        input_file.write(json.dumps({"session_id": session_id, "ticket_id": ticket_id}) + "\n")
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as input_file:
+            writer = csv.writer(input_file, delimiter="\t" if path.endswith(".tsv") else ",")
+            for values in iter_input_rows(rows, sessions):
+                writer.writerow(["" if value is None else value for value in values])
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_mock_api(args):
+    # The mock runs in its own process so it doesn't compete with the client for the GIL.
+    port = free_port()
+    command = [sys.executable, "-m", "mock_api", "--port", str(port), "--latency", str(args.latency),
+               "--latency-jitter", str(args.latency_jitter), "--error-rate", str(args.error_rate)]
+    if args.rate_limit:
+        command += ["--rate-limit", str(args.rate_limit)]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("mock API did not start")
+
+
+def run_one(args) -> dict:
+    import aiohttp
+
+    from credential_pool import credential_pool_for
+    from data_processor import DataProcessor
+    from request_engine import RequestEngine
+    from token_provider import TokenManager
+    from transport import HttpTransport
+
+    with tempfile.TemporaryDirectory() as workdir:
+        input_path = os.path.join(workdir, f"sessions.{args.input_format}")
+        generate_input(input_path, args.rows, args.sessions)
+
+        mock_api, base_url = start_mock_api(args)
+        try:
+            clients = [(f"bench{index}", "bench") for index in range(args.clients)]
+            credentials = credential_pool_for(TokenManager(auth_url=f"{base_url}/oauth/token"), clients, "bench")
+            credentials.fetch_tokens()
+
+            ingest_started = time.perf_counter()
+            data_processor = DataProcessor("1", api_base_url=base_url)
+            work_items = data_processor.build_work_items(data_processor.iter_file_data(input_path))
+            ingest_seconds = time.perf_counter() - ingest_started
+
+            latencies = array("d")
+
+            async def on_request_start(session, context, params):
+                context.started = time.perf_counter()
+
+            async def on_request_end(session, context, params):
+                latencies.append(time.perf_counter() - context.started)
+
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_start.append(on_request_start)
+            trace_config.on_request_end.append(on_request_end)
+
+            signals = 0
+            failures = 0
+
+            def on_progress(completed):
+                nonlocal signals
+                signals += 1
+
+            def on_results(results):
+                nonlocal signals, failures
+                signals += 1
+                failures += sum(1 for _, _, status, _ in results if not 200 <= status < 300)
+
+            transport = HttpTransport(limit_per_host=args.concurrency, trace_configs=[trace_config])
+            engine = RequestEngine(None, work_items, data_processor.format_link, max_concurrent_requests=args.concurrency,
+                                   adaptive_concurrency=args.adaptive, credentials=credentials,
+                                   transport=transport, on_progress=on_progress, on_results=on_results)
+            dispatch_started = time.perf_counter()
+            engine.run()
+            dispatch_seconds = time.perf_counter() - dispatch_started
+            transport.close()
+
+            report_seconds = 0.0
+            if engine.failed_requests:
+                report_started = time.perf_counter()
+                engine.failed_requests.save_to_file(os.path.join(workdir, "failed.xlsx"))
+                report_seconds = time.perf_counter() - report_started
+            engine.failed_requests.discard()
+        finally:
+            mock_api.terminate()
+            mock_api.wait()
+
+    sorted_latencies = sorted(latencies)
+    return {
+        "rows": args.rows,
+        "ingest_rows_per_sec": round(len(work_items) / ingest_seconds if ingest_seconds else 0.0, 1),
+        "requests_per_sec": round(engine.completed_requests / dispatch_seconds if dispatch_seconds else 0.0, 1),
+        "p50_ms": round(percentile(sorted_latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(sorted_latencies, 0.99) * 1000, 2),
+        "failures": failures,
+        "report_seconds": round(report_seconds, 3),
+        "ui_signals_per_sec": round(signals / dispatch_seconds if dispatch_seconds else 0.0, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "throttled": sum(credential.throttled for credential in credentials.credentials),
+    }
+
+
+def find_regressions(results, baseline, tolerance: float):
+    regressions = []
+    previous = {entry["rows"]: entry for entry in baseline}
+    for result in results:
+        before = previous.get(result["rows"])
+        if before is None:
+            continue
+        if result["requests_per_sec"] < before["requests_per_sec"] * (1 - tolerance):
+            regressions.append(f"{result['rows']} rows: {result['requests_per_sec']} req/s "
+                               f"(baseline {before['requests_per_sec']})")
+        if result["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{result['rows']} rows: p99 {result['p99_ms']} ms (baseline {before['p99_ms']})")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmark",
+                                     description="Load-test the request pipeline against a local mock API.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--input-format", choices=("xlsx", "csv", "tsv", "jsonl"), default="xlsx")
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--adaptive", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.02, help="mock API latency in seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="mock API requests per second per client before 429s")
+    parser.add_argument("--clients", type=int, default=1, help="API clients to spread the requests over")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if args.single:
+        args.rows = args.rows[0]
+        print(json.dumps(run_one(args)))
+        return 0
+
+    # Each size runs in a fresh interpreter so peak RSS is measured per size.
+    results = []
+    for rows in args.rows:
+        command = [sys.executable, "-m", "benchmark", "--single", "--rows", str(rows)] + [
+            option for name, value in (("--sessions", args.sessions), ("--input-format", args.input_format),
+                                       ("--concurrency", args.concurrency),
+                                       ("--latency", args.latency), ("--latency-jitter", args.latency_jitter),
+                                       ("--error-rate", args.error_rate), ("--rate-limit", args.rate_limit),
+                                       ("--clients", args.clients))
+            if value is not None for option in (name, str(value))]
+        if args.adaptive:
+            command.append("--adaptive")
+        output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        print("  ".join(f"{key}={value}" for key, value in result.items()))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = find_regressions(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+import argparse
+import os
+import sys
+import time
+
+STARTED = time.perf_counter()
+
+# Time from this module starting to load to the point where the job is ready to
+# fetch a token and read the input: argparse and the engine modules. Interpreter
+# start-up comes before STARTED and isn't counted (python -X importtime shows it).
+COLD_START_BUDGET = 0.5
+
+METHODS = {
+    "add": "PUT",
+    "remove": "DELETE",
+    # Each row says whether to add, remove or move the ticket (see job_plan).
+    "plan": "PLAN",
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cli",
+                                     description="Add, remove or move Bizzabo session registrations in bulk.")
+    parser.add_argument("command", choices=sorted(METHODS) + ["manifest"])
+    parser.add_argument("--file", help="Excel, CSV, TSV or JSONL input with the registrations or the job plan, "
+                             "or the JSON manifest to run")
+    parser.add_argument("--event", help="Bizzabo event ID")
+    parser.add_argument("--client-id", default=os.environ.get("BIZZABO_CLIENT_ID"))
+    parser.add_argument("--client-secret", default=os.environ.get("BIZZABO_CLIENT_SECRET"))
+    parser.add_argument("--account-id", default=os.environ.get("BIZZABO_ACCOUNT_ID"))
+    parser.add_argument("--clients-file", help="JSON list of additional API clients of the account "
+                                               "({\"client_id\": ..., \"client_secret\": ...}) to spread requests over")
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--adaptive", action="store_true", help="adapt concurrency to 429s and latency")
+    parser.add_argument("--diff", action="store_true",
+                        help="fetch current registrations first and only send the changes")
+    parser.add_argument("--api-base-url", default=None, help="override the Bizzabo API base URL")
+    parser.add_argument("--auth-url", default=None, help="override the OAuth token URL (e.g. a local mock_api)")
+    parser.add_argument("--resume", action="store_true", help="skip registrations completed by an earlier run")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="requests per second allowed for the account, shared by all of its jobs")
+    parser.add_argument("--share-rate-limit", action="store_true",
+                        help="also share the rate limit with other processes on this host")
+    parser.add_argument("--cancel-deadline", type=float, default=5.0,
+                        help="seconds in-flight requests get to finish after Ctrl-C")
+    parser.add_argument("--response-bodies", choices=("drain", "discard", "full"), default="drain",
+                        help="what to do with successful response bodies; 'full' keeps them, for debugging")
+    parser.add_argument("--max-error-bytes", type=int, default=2048, help="bytes of each error body to keep")
+    parser.add_argument("--in-order", action="store_true",
+                        help="send in input order instead of round-robin across sessions")
+    parser.add_argument("--per-session-limit", type=int, default=None,
+                        help="most requests dispatched to one session at a time")
+    parser.add_argument("--workers", type=int, default=None, help="processes used to run a manifest")
+    parser.add_argument("--metrics-output", help="write request metrics here (.json, or .prom for Prometheus text)")
+    parser.add_argument("--failed-output", help="stream failed registrations to this .csv, .jsonl or .xlsx file")
+    parser.add_argument("--timings", action="store_true", help="report cold-start time against the budget")
+
+    args = parser.parse_args(argv)
+    if not args.file:
+        parser.error("--file is required")
+    if args.command != "manifest" and not args.event:
+        parser.error("--event is required")
+    required = ("account_id",) if args.clients_file else ("client_id", "client_secret", "account_id")
+    missing = [name for name in required if not getattr(args, name)]
+    if missing:
+        parser.error("missing credentials: " + ", ".join("--" + name.replace("_", "-") for name in missing) +
+                     " (or BIZZABO_CLIENT_ID / BIZZABO_CLIENT_SECRET / BIZZABO_ACCOUNT_ID)")
+    try:
+        args.clients = api_clients(args)
+    except (OSError, ValueError) as e:
+        parser.error(f"--clients-file: {e}")
+    if not args.clients:
+        parser.error("no API clients: --clients-file is empty and no --client-id / --client-secret was given")
+    return args
+
+
+def job_options(args) -> dict:
+    return {
+        "max_concurrent_requests": args.concurrency,
+        "adaptive_concurrency": args.adaptive,
+        "diff": args.diff,
+        "resume": args.resume,
+        "api_base_url": args.api_base_url,
+        "auth_url": args.auth_url,
+        "rate_limit": args.rate_limit,
+        "fair_scheduling": not args.in_order,
+        "per_session_limit": args.per_session_limit,
+    }
+
+
+def api_clients(args) -> list:
+    from credential_pool import load_clients
+
+    clients = [(args.client_id, args.client_secret)] if args.client_id and args.client_secret else []
+    if args.clients_file:
+        clients += [client for client in load_clients(args.clients_file) if client not in clients]
+    return clients
+
+
+def print_client_stats(stats, unavailable=()):
+    from credential_pool import format_stats, format_unavailable
+
+    for line in format_stats(stats) + format_unavailable(unavailable):
+        print(line, file=sys.stderr)
+
+
+def run_single_job(args) -> int:
+    from credential_pool import credential_pool_for
+    from job_manifest import JobSpec, JobStream
+    from rate_limiter import rate_limiter_for
+    from request_engine import RequestEngine
+    from response_policy import ResponsePolicy
+    from token_provider import TokenManager
+
+    token_manager = TokenManager(auth_url=args.auth_url) if args.auth_url else TokenManager()
+    credentials = credential_pool_for(token_manager, args.clients, args.account_id)
+    options = job_options(args)
+    job = JobSpec(args.event, args.file, METHODS[args.command])
+    # The engine fetches the tokens while the input is still being read.
+    stream = JobStream(job, credentials.credentials[0].token_source, options,
+                       on_message=lambda message: print(f"\n{message}", file=sys.stderr)).start()
+
+    failures = 0
+
+    def report_progress(completed):
+        total = stream.feed.total if stream.feed.finished else f"{stream.feed.total}+"
+        print(f"\r{completed}/{total}", end="", file=sys.stderr, flush=True)
+
+    def report_results(results):
+        nonlocal failures
+        for session_id, ticket_id, status, response_text in results:
+            if not 200 <= status < 300:
+                failures += 1
+                print(f"\n{status} session {session_id} ticket {ticket_id}: {response_text}", file=sys.stderr)
+
+    engine = RequestEngine(None, stream.feed, stream.format_link, request_method=job.method,
+                           max_concurrent_requests=args.concurrency, adaptive_concurrency=args.adaptive,
+                           credentials=credentials, on_progress=report_progress, on_results=report_results,
+                           journal=stream.journal, metrics_path=args.metrics_output, failed_output=args.failed_output,
+                           rate_limiter=rate_limiter_for(args.account_id, args.rate_limit,
+                                                         shared=args.share_rate_limit),
+                           cancel_deadline=args.cancel_deadline, fair_scheduling=not args.in_order,
+                           per_session_limit=args.per_session_limit,
+                           response_policy=ResponsePolicy(args.response_bodies, args.max_error_bytes))
+    try:
+        engine.run()
+    except KeyboardInterrupt:
+        engine.cancel()
+        print("\nCancelled.", file=sys.stderr)
+        return 130
+
+    if engine.error:
+        print(f"\n{engine.error}", file=sys.stderr)
+        return 1
+    print(f"\nFinished: {engine.completed_requests - failures} succeeded, {failures} failed.", file=sys.stderr)
+    if len(credentials) > 1 or credentials.unavailable:
+        print_client_stats(credentials.stats(), credentials.unavailable)
+    return 0 if failures == 0 else 1
+
+
+def run_manifest(args) -> int:
+    from job_manifest import ManifestRunner, discard_reports, load_manifest, write_report
+
+    jobs = load_manifest(args.file)
+
+    def report_progress(completed, total):
+        print(f"\r{completed}/{total}", end="", file=sys.stderr, flush=True)
+
+    def report_job(result):
+        status = result.error or f"{result.completed} sent, {result.failures} failed"
+        print(f"\n{result.job.method} event {result.job.event_id} ({result.job.file}): {status}", file=sys.stderr)
+        for message in result.messages:
+            print(f"  {message}", file=sys.stderr)
+        if result.client_stats:
+            print_client_stats(result.client_stats)
+
+    runner = ManifestRunner((args.clients, args.account_id), job_options(args),
+                            max_workers=args.workers, on_progress=report_progress, on_job_finished=report_job)
+    results = runner.run(jobs)
+
+    failed_jobs = [result for result in results if result.error]
+    failures = sum(result.failures for result in results)
+    print(f"Finished {len(results)} jobs: {len(failed_jobs)} errored, {failures} failed registrations.",
+          file=sys.stderr)
+    if args.failed_output and failures:
+        write_report(results, args.failed_output)
+    else:
+        discard_reports(results)
+    return 0 if not failed_jobs and failures == 0 else 1
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if args.timings:
+        import request_engine  # noqa: F401  (counted towards the cold start)
+
+        startup = time.perf_counter() - STARTED
+        print(f"Cold start: {startup * 1000:.0f} ms (budget {COLD_START_BUDGET * 1000:.0f} ms)", file=sys.stderr)
+
+    if args.command == "manifest":
+        return run_manifest(args)
+    return run_single_job(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import asyncio
+import time
+from typing import Callable, Optional
+
+BACKOFF_STATUSES = (429, 503)
+
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(self, initial_limit: int = 25, min_limit: int = 1, max_limit: int = 100,
+                 backoff_factor: float = 0.5, latency_tolerance: float = 2.0, smoothing: float = 0.1,
+                 on_limit_change: Optional[Callable[[int], None]] = None):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_factor = backoff_factor
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.on_limit_change = on_limit_change
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+        self._latency_avg = None
+        self._latency_baseline = None
+        self._last_backoff = 0.0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self, status: int, latency: float):
+        async with self._condition:
+            self._in_flight -= 1
+            self._update_limit(status, latency)
+            self._condition.notify_all()
+
+    def _update_limit(self, status: int, latency: float):
+        success = 200 <= status < 300
+        if success:
+            self._record_latency(latency)
+
+        congested = status in BACKOFF_STATUSES or (
+            self._latency_baseline is not None
+            and self._latency_avg > self._latency_baseline * self.latency_tolerance
+        )
+
+        if congested:
+            # Back off at most once per smoothed round trip, so a burst of 429s from
+            # requests that were already in flight only counts as one signal.
+            now = time.monotonic()
+            if now - self._last_backoff < (self._latency_avg or 0.0):
+                return
+            self._last_backoff = now
+            new_limit = max(float(self.min_limit), self._limit * self.backoff_factor)
+        elif success:
+            # Additive increase: roughly +1 for every full window of successful requests.
+            new_limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+        else:
+            return
+
+        previous_limit = self.limit
+        self._limit = new_limit
+        if self.limit != previous_limit and self.on_limit_change is not None:
+            self.on_limit_change(self.limit)
+
+    def _record_latency(self, latency: float):
+        if self._latency_avg is None:
+            self._latency_avg = latency
+        else:
+            self._latency_avg += self.smoothing * (latency - self._latency_avg)
+
+        if self._latency_baseline is None or self._latency_avg < self._latency_baseline:
+            self._latency_baseline = self._latency_avg
+        else:
+            # Let the baseline drift up slowly so one unusually fast early response
+            # doesn't keep the limiter backing off forever.
+            self._latency_baseline += self.smoothing * 0.05 * (self._latency_avg - self._latency_baseline)
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence, Tuple
+
+from token_provider import TokenManager, TokenSource
+
+# Weight given to each new response in a client's running 429 rate: roughly the
+# last 20 responses count.
+THROTTLE_DECAY = 0.05
+
+# A client that is throttled all the time still gets a trickle of requests, so the
+# pool notices when it recovers.
+MIN_WEIGHT = 0.05
+
+# Wait after a failed token refresh before the next attempt, doubled on each
+# further failure up to the maximum.
+REFRESH_BACKOFF = 1.0
+MAX_REFRESH_BACKOFF = 60.0
+
+
+class Credential:
+    # One API client: its token and what the run has seen from it. Its share of the
+    # traffic shrinks with its recent 429 rate.
+    def __init__(self, token_source: TokenSource = None, access_token: str = None, name: str = None):
+        self.token_source = token_source
+        self.access_token = access_token
+        self.name = name or (token_source.client_id if token_source is not None else "default")
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.throttle_rate = 0.0
+        self._current_weight = 0.0
+        self._refresh = None
+        # After a failed refresh, the next one waits until _next_refresh.
+        self._refresh_failures = 0
+        self._next_refresh = 0.0
+
+    @property
+    def weight(self) -> float:
+        return max(MIN_WEIGHT, 1.0 - self.throttle_rate)
+
+    def record(self, status: int):
+        self.requests += 1
+        throttled = status == 429
+        if throttled:
+            self.throttled += 1
+        elif not 200 <= status < 300:
+            self.errors += 1
+        self.throttle_rate += THROTTLE_DECAY * (throttled - self.throttle_rate)
+
+    def expires_soon(self) -> bool:
+        return self.token_source is not None and self.token_source.expires_soon()
+
+    async def refresh(self, stale_token: str):
+        # Replaces stale_token, unless another caller already has. All callers that
+        # hit the same stale token wait on a single refresh.
+        if self.token_source is None or self.access_token != stale_token:
+            return
+        if self._refresh is None:
+            if time.monotonic() < self._next_refresh:
+                # Backing off after a failed refresh: the caller goes on with the
+                # current token, and its request fails as a 401 if it has expired.
+                return
+            self._refresh = asyncio.ensure_future(self._fetch_refreshed_token(stale_token))
+        await asyncio.shield(self._refresh)
+
+    async def _fetch_refreshed_token(self, stale_token: str):
+        try:
+            loop = asyncio.get_running_loop()
+            try:
+                access_token = await loop.run_in_executor(None, self.token_source.refresh, stale_token)
+            except Exception:
+                access_token = None
+            if access_token:
+                self.access_token = access_token
+                self._refresh_failures = 0
+            else:
+                backoff = min(MAX_REFRESH_BACKOFF, REFRESH_BACKOFF * 2 ** self._refresh_failures)
+                self._refresh_failures += 1
+                self._next_refresh = time.monotonic() + backoff
+        finally:
+            self._refresh = None
+
+
+class CredentialPool:
+    # Spreads requests across several API clients of the same account, so a job isn't
+    # capped at one client's quota. Each request picks a client by smooth weighted
+    # round-robin, which interleaves the clients instead of sending them bursts.
+    def __init__(self, credentials: List[Credential]):
+        self.credentials = credentials
+        self.unavailable = []
+        self.started = time.monotonic()
+
+    def __len__(self):
+        return len(self.credentials)
+
+    def fetch_tokens(self) -> bool:
+        # Tokens are fetched in parallel. Clients that can't authenticate are left out
+        # of the run, with the reason in unavailable; it only fails when none can.
+        missing = [credential for credential in self.credentials
+                   if credential.access_token is None and credential.token_source is not None]
+        reasons = {}
+        if missing:
+            with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+                errors = executor.map(self._fetch_token, missing)
+                reasons = dict(zip((credential.name for credential in missing), errors))
+
+        self.unavailable = [(credential.name, reasons.get(credential.name) or "authentication failed")
+                            for credential in self.credentials if not credential.access_token]
+        self.credentials = [credential for credential in self.credentials if credential.access_token]
+        self.started = time.monotonic()
+        return bool(self.credentials)
+
+    @staticmethod
+    def _fetch_token(credential: Credential) -> str:
+        try:
+            credential.access_token = credential.token_source.get()
+        except Exception as e:
+            credential.access_token = ""
+            return f"{type(e).__name__}: {e}"
+        return ""
+
+    def choose(self) -> Credential:
+        credentials = self.credentials
+        if len(credentials) == 1:
+            return credentials[0]
+
+        total = 0.0
+        chosen = None
+        for credential in credentials:
+            weight = credential.weight
+            credential._current_weight += weight
+            total += weight
+            if chosen is None or credential._current_weight > chosen._current_weight:
+                chosen = credential
+        chosen._current_weight -= total
+        return chosen
+
+    def stats(self) -> List[dict]:
+        elapsed = time.monotonic() - self.started
+        total_weight = sum(credential.weight for credential in self.credentials) or 1.0
+        return [
+            {
+                "client": credential.name,
+                "requests": credential.requests,
+                "requests_per_second": round(credential.requests / elapsed, 2) if elapsed else 0.0,
+                "throttled": credential.throttled,
+                "errors": credential.errors,
+                "throttle_rate": round(credential.throttle_rate, 3),
+                "share": round(credential.weight / total_weight, 3),
+            }
+            for credential in self.credentials
+        ]
+
+
+def credential_pool_for(token_manager: TokenManager, clients: Sequence[Tuple[str, str]],
+                        account_id: str) -> CredentialPool:
+    return CredentialPool([Credential(token_manager.source(client_id, client_secret, account_id))
+                           for client_id, client_secret in clients])
+
+
+def format_stats(stats: List[dict]) -> List[str]:
+    return [f"Client {entry['client']}: {entry['requests']} requests ({entry['requests_per_second']:.1f}/s), "
+            f"{entry['throttled']} throttled, {entry['errors']} other errors, share {entry['share']:.0%}"
+            for entry in stats]
+
+
+def format_unavailable(unavailable: List[Tuple[str, str]]) -> List[str]:
+    return [f"Client {name}: could not obtain a token ({reason}), not used." for name, reason in unavailable]
+
+
+def load_clients(path: str) -> List[Tuple[str, str]]:
+    # A JSON list of {"client_id": ..., "client_secret": ...} objects.
+    with open(path, encoding="utf-8") as clients_file:
+        entries = json.load(clients_file)
+    clients = []
+    for number, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict) or not entry.get("client_id") or not entry.get("client_secret"):
+            raise ValueError(f"Invalid client entry {number} in {path}")
+        clients.append((str(entry["client_id"]), str(entry["client_secret"])))
+    return clients
@@ -1,41 +1,78 @@
-import openpyxl
-from typing import List
-
-
-class DataProcessor:
-    def __init__(self, event_id: str):
-        self.event_id = event_id
-
-    def generate_links(self, data_dict: dict) -> List[str]:
-        links = []
-        for key, value_list in data_dict.items():
-            for value in value_list:
-                link = f"https://api.bizzabo.com/v1/events/{self.event_id}/agenda/sessions/{key}/registrations/{value}"
-                links.append(link)
-        return links
-
-    def process_excel_data(self, file_path: str) -> dict:
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook.active
-
-        data_dict = {}
-
-        for col in sheet.columns:
-            key = col[0].value
-            if key is None:
-                continue
-
-            key_int = int(key)
-
-            values = []
-            for cell in col[1:]:
-                if cell.value is None:
-                    continue
-
-                if isinstance(cell.value, int):
-                    values.append(cell.value)
-                else:
-                    value_str = format(cell.value, '.0f') if cell.value.is_integer() else format(cell.value, '.{}g'.format(cell.number_format.count('0')))
-                    values.append(value_str)
-            data_dict[key_int] = values
-        return data_dict
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from input_readers import TicketId, iter_input_pairs
+
+API_BASE_URL = "https://api.bizzabo.com"
+
+_MAX_PACKED_TICKET_ID = 2 ** 63 - 1
+
+
+class WorkItems:
+    # (session_id, ticket_id) pairs packed into two int64 arrays, 16 bytes per item
+    # instead of a ~100-byte URL string. Ticket ids that aren't plain integers are
+    # marked with -1 and kept in a small side table.
+    __slots__ = ("session_ids", "ticket_ids", "text_ticket_ids")
+
+    def __init__(self, pairs: Iterable[Tuple[int, TicketId]] = ()):
+        self.session_ids = array("q")
+        self.ticket_ids = array("q")
+        self.text_ticket_ids = {}
+        for item in pairs:
+            self.append(*item)
+
+    def append(self, session_id: int, ticket_id: TicketId):
+        if isinstance(ticket_id, int) and 0 <= ticket_id <= _MAX_PACKED_TICKET_ID:
+            self.ticket_ids.append(ticket_id)
+        else:
+            self.text_ticket_ids[len(self.ticket_ids)] = ticket_id
+            self.ticket_ids.append(-1)
+        self.session_ids.append(session_id)
+
+    def __len__(self):
+        return len(self.session_ids)
+
+    def __getitem__(self, index: int) -> Tuple[int, TicketId]:
+        ticket_id = self.ticket_ids[index]
+        return self.session_ids[index], self.text_ticket_ids[index] if ticket_id < 0 else ticket_id
+
+    def __iter__(self) -> Iterator[Tuple[int, TicketId]]:
+        text_ticket_ids = self.text_ticket_ids
+        for index, (session_id, ticket_id) in enumerate(zip(self.session_ids, self.ticket_ids)):
+            yield session_id, text_ticket_ids[index] if ticket_id < 0 else ticket_id
+
+
+class DataProcessor:
+    def __init__(self, event_id: str, api_base_url: str = API_BASE_URL):
+        self.event_id = event_id
+        self.api_base_url = api_base_url
+
+    def build_work_items(self, pairs: Iterable[Tuple[int, TicketId]],
+                         completed: Optional[Set[Tuple[int, str]]] = None) -> WorkItems:
+        return WorkItems(self.skip_completed(pairs, completed))
+
+    @staticmethod
+    def skip_completed(pairs: Iterable[Tuple[int, TicketId]],
+                       completed: Optional[Set[Tuple[int, str]]] = None) -> Iterator[Tuple[int, TicketId]]:
+        if not completed:
+            return iter(pairs)
+        return ((session_id, ticket_id) for session_id, ticket_id in pairs
+                if (session_id, str(ticket_id)) not in completed)
+
+    def format_link(self, session_id, ticket_id) -> str:
+        return f"{self.api_base_url}/v1/events/{self.event_id}/agenda/sessions/{session_id}/registrations/{ticket_id}"
+
+    @staticmethod
+    def iter_pairs(data_dict: Dict[int, List[TicketId]]) -> Iterator[Tuple[int, TicketId]]:
+        for session_id, ticket_ids in data_dict.items():
+            for ticket_id in ticket_ids:
+                yield session_id, ticket_id
+
+    def process_file_data(self, file_path: str) -> Dict[int, List[TicketId]]:
+        data_dict = {}
+        for session_id, ticket_id in self.iter_file_data(file_path):
+            data_dict.setdefault(session_id, []).append(ticket_id)
+        return data_dict
+
+    def iter_file_data(self, file_path: str) -> Iterator[Tuple[int, TicketId]]:
+        return iter_input_pairs(file_path)
@@ -1,30 +1,177 @@
-import openpyxl
-from PyQt6.QtWidgets import QFileDialog
+import csv
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+
+from input_readers import parse_ticket_id
+
+REPORT_FIELDS = ("session_id", "ticket_id", "status", "error_class", "attempts", "error", "operation",
+                 "to_session_id")
+
+MAX_ERROR_LENGTH = 500
+
+
+def report_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension in (".xlsx", ".xlsm"):
+        return "xlsx"
+    return "csv"
+
+
+def error_class_for(status: int, error: str = "") -> str:
+    if status == 0:
+        # Transport errors are reported as "ExceptionName: message" by the engine.
+        return error.split(":", 1)[0] or "ClientError"
+    if status in (401, 403):
+        return "auth"
+    if status == 404:
+        return "not_found"
+    if status == 409:
+        return "conflict"
+    if status == 429:
+        return "rate_limited"
+    if status >= 500:
+        return "server_error"
+    return "client_error"
+
+
+class ReportWriter:
+    # Streams report rows straight to disk. The first two columns are session_id and
+    # ticket_id, so every format can be fed back in as the input of a retry job; with
+    # the operation columns it can also be run as a job plan. Extra fields go after
+    # the standard ones.
+    def __init__(self, path: str, fields=REPORT_FIELDS):
+        self.path = path
+        self.fields = tuple(fields)
+        self.format = report_format(path)
+        if self.format == "xlsx":
+            import openpyxl
+
+            self._workbook = openpyxl.Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet()
+            self._sheet.append(self.fields)
+        else:
+            self._file = open(path, "w", newline="", encoding="utf-8")
+            if self.format == "csv":
+                self._writer = csv.writer(self._file)
+                self._writer.writerow(self.fields)
+
+    def write(self, row):
+        if self.format == "xlsx":
+            self._sheet.append(row)
+        elif self.format == "csv":
+            self._writer.writerow(row)
+        else:
+            self._file.write(json.dumps(dict(zip(self.fields, row))) + "\n")
+
+    def close(self):
+        if self.format == "xlsx":
+            self._workbook.save(self.path)
+        else:
+            self._file.close()
 
 
 class FailedRequests:
-    def __init__(self):
-        self.failed_requests = {}
+    # Failures are written out as they happen instead of being held in memory. Without
+    # a path they go to a temporary CSV spool that save_to_file converts afterwards.
+    def __init__(self, path: str = None):
+        self.path = path
+        self.count = 0
+        self.status_counts = Counter()
+        self._spool_path = path if path and report_format(path) == "csv" else None
+        self._file = None
+        self._writer = None
+
+    def __len__(self):
+        return self.count
+
+    def add_failed_request(self, session_id, ticket_id, status: int = None, error: str = "", attempts: int = 1,
+                           error_class: str = None, operation: str = "", to_session_id: int = None):
+        if self._writer is None:
+            self._open_spool()
+        error = " ".join((error or "").split())[:MAX_ERROR_LENGTH]
+        if error_class is None:
+            error_class = error_class_for(status or 0, error)
+        self._writer.writerow((session_id, ticket_id, status, error_class, attempts, error, operation, to_session_id))
+        self.count += 1
+        self.status_counts[status] += 1
 
-    def add_failed_request(self, session_id, ticket_id):
-        if session_id not in self.failed_requests:
-            self.failed_requests[session_id] = []
+    def _open_spool(self):
+        if self._spool_path is None:
+            descriptor, self._spool_path = tempfile.mkstemp(prefix="failed-requests-", suffix=".csv")
+            os.close(descriptor)
+        self._file = open(self._spool_path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(REPORT_FIELDS)
 
-        self.failed_requests[session_id].append(ticket_id)
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+        if self.path and self.count and self._spool_path != self.path:
+            self.save_to_file(self.path)
+            self.discard()
 
-    def save_to_excel(self, parent_widget):
-        if not self.failed_requests:  # Check if the dictionary is empty
+    def iter_rows(self):
+        if self._spool_path is None or not self.count:
             return
+        if self._file is not None:
+            self._file.flush()
+        yield from read_report_rows(self._spool_path)
+
+    def save_report(self, parent_widget):
+        if not self.count:
+            return
+
+        from PyQt6.QtWidgets import QFileDialog
 
-        file_name, _ = QFileDialog.getSaveFileName(parent_widget, "Save Failed Requests", "",
-                                                   "Excel Files (*.xlsx);;All Files (*)")
+        file_name, _ = QFileDialog.getSaveFileName(
+            parent_widget, "Save Failed Requests", "",
+            "Excel Files (*.xlsx);;CSV Files (*.csv);;JSON Lines (*.jsonl);;All Files (*)")
         if file_name:
-            workbook = openpyxl.Workbook()
-            sheet = workbook.active
+            self.save_to_file(file_name)
+
+    def save_to_file(self, file_name):
+        if not self.count:
+            return
+        if self._file is not None:
+            self._file.flush()
+        if report_format(file_name) == "csv":
+            if os.path.abspath(file_name) != os.path.abspath(self._spool_path):
+                shutil.copyfile(self._spool_path, file_name)
+            return
+
+        writer = ReportWriter(file_name)
+        try:
+            for row in self.iter_rows():
+                writer.write(row)
+        finally:
+            writer.close()
+
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+        if self._spool_path is not None and self._spool_path != self.path:
+            try:
+                os.remove(self._spool_path)
+            except FileNotFoundError:
+                pass
+        self._spool_path = None
 
-            for idx, (key, values) in enumerate(self.failed_requests.items()):
-                sheet.cell(row=1, column=idx + 1).value = key
-                for row_idx, value in enumerate(values, start=2):
-                    sheet.cell(row=row_idx, column=idx + 1).value = value
 
-            workbook.save(file_name)
+def read_report_rows(path: str):
+    # The rows of a CSV failure report, with their numbers parsed again.
+    with open(path, newline="", encoding="utf-8") as report_file:
+        rows = csv.reader(report_file)
+        next(rows, None)
+        for session_id, ticket_id, status, error_class, attempts, error, operation, to_session_id in rows:
+            yield (int(session_id), parse_ticket_id(ticket_id),
+                   int(status) if status else None, error_class, int(attempts), error, operation,
+                   int(to_session_id) if to_session_id else None)
@@ -0,0 +1,154 @@
+import csv
+import json
+import os
+from typing import Callable, Dict, Iterator, Tuple, Union
+
+TicketId = Union[int, str]
+
+LONG_HEADER = ["session_id", "ticket_id"]
+
+EXTENSIONS = {
+    ".xlsx": "xlsx",
+    ".xlsm": "xlsx",
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".tab": "tsv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+READERS: Dict[str, Callable[[str], Iterator[Tuple[int, TicketId]]]] = {}
+
+
+def register_reader(*formats: str):
+    def register(reader):
+        for input_format in formats:
+            READERS[input_format] = reader
+        return reader
+    return register
+
+
+def detect_format(file_path: str) -> str:
+    input_format = EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+    if input_format is not None:
+        return input_format
+
+    with open(file_path, "rb") as input_file:
+        head = input_file.read(4096)
+    if head.startswith(b"PK\x03\x04"):
+        return "xlsx"
+    text = head.decode("utf-8-sig", errors="ignore").lstrip()
+    if text.startswith(("{", "[")):
+        return "jsonl"
+    first_line = text.splitlines()[0] if text else ""
+    return "tsv" if "\t" in first_line else "csv"
+
+
+def iter_input_pairs(file_path: str) -> Iterator[Tuple[int, TicketId]]:
+    # Every reader yields the same normalized (session_id, ticket_id) pairs, in row order.
+    return READERS[detect_format(file_path)](file_path)
+
+
+def format_ticket_id(value, number_format: str = None) -> TicketId:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        # A whole number stored as a float (1000000.0) is the same id as the int.
+        if value.is_integer():
+            return int(value)
+        if number_format is None:
+            return str(value)
+        return format(value, '.{}g'.format(number_format.count('0')))
+    return str(value).strip()
+
+
+def parse_ticket_id(text: str) -> TicketId:
+    # Plain decimal numbers become ints, like numeric cells in a workbook; anything
+    # else, including ids with leading zeros, is kept as text. "1000000.0", as
+    # written by tools that exported the id as a float, reads as 1000000.
+    text = text.strip()
+    if text.isdigit() and (text[0] != "0" or text == "0"):
+        return int(text)
+    whole, point, fraction = text.partition(".")
+    if point and whole.isdigit() and fraction.isdigit() and not fraction.strip("0"):
+        return parse_ticket_id(whole)
+    return text
+
+
+@register_reader("xlsx")
+def read_excel(file_path: str) -> Iterator[Tuple[int, TicketId]]:
+    import openpyxl
+
+    # Read-only mode streams rows from the sheet XML instead of building the
+    # whole cell model, so memory stays flat regardless of the sheet size.
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows()
+        header = next(rows, ())
+        if [cell.value for cell in header[:2]] == LONG_HEADER:
+            # One (session, ticket) pair per row, as written by the failure report.
+            for row in rows:
+                if row[0].value is not None and row[1].value is not None:
+                    yield int(row[0].value), format_ticket_id(row[1].value, row[1].number_format)
+            return
+
+        session_ids = [None if cell.value is None else int(cell.value) for cell in header]
+        for row in rows:
+            for session_id, cell in zip(session_ids, row):
+                if session_id is None or cell.value is None:
+                    continue
+                yield session_id, format_ticket_id(cell.value, cell.number_format)
+    finally:
+        workbook.close()
+
+
+def _read_delimited(file_path: str, delimiter: str) -> Iterator[Tuple[int, TicketId]]:
+    with open(file_path, newline="", encoding="utf-8-sig") as input_file:
+        rows = csv.reader(input_file, delimiter=delimiter)
+        header = [value.strip() for value in next(rows, [])]
+        if header[:2] == LONG_HEADER:
+            for row in rows:
+                if len(row) >= 2 and row[0].strip() and row[1].strip():
+                    yield int(row[0]), parse_ticket_id(row[1])
+            return
+
+        # Same layout as the workbook: session ids across the header, tickets below.
+        session_ids = [int(value) if value else None for value in header]
+        for row in rows:
+            for session_id, value in zip(session_ids, row):
+                if session_id is not None and value and not value.isspace():
+                    yield session_id, parse_ticket_id(value)
+
+
+@register_reader("csv")
+def read_csv(file_path: str) -> Iterator[Tuple[int, TicketId]]:
+    return _read_delimited(file_path, ",")
+
+
+@register_reader("tsv")
+def read_tsv(file_path: str) -> Iterator[Tuple[int, TicketId]]:
+    return _read_delimited(file_path, "\t")
+
+
+@register_reader("jsonl")
+def read_jsonl(file_path: str) -> Iterator[Tuple[int, TicketId]]:
+    # One record per line: {"session_id": ..., "ticket_id": ...} (camelCase is accepted
+    # too) or a [session_id, ticket_id] pair.
+    with open(file_path, encoding="utf-8-sig") as input_file:
+        for number, line in enumerate(input_file, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, dict):
+                session_id = record.get("session_id", record.get("sessionId"))
+                ticket_id = record.get("ticket_id", record.get("ticketId"))
+            elif isinstance(record, list) and len(record) == 2:
+                session_id, ticket_id = record
+            else:
+                raise ValueError(f"{file_path}:{number}: expected a session/ticket record, got {line.strip()!r}")
+            if session_id is None or ticket_id is None:
+                continue
+            if isinstance(ticket_id, str):
+                yield int(session_id), parse_ticket_id(ticket_id)
+            else:
+                yield int(session_id), format_ticket_id(ticket_id)
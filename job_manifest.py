@@ -0,0 +1,297 @@
+import json
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from job_plan import PLAN
+
+METHODS = {
+    "add": "PUT",
+    "remove": "DELETE",
+    "put": "PUT",
+    "delete": "DELETE",
+    "plan": PLAN,
+}
+
+
+def _ignore(*args):
+    pass
+
+
+class JobSpec(NamedTuple):
+    event_id: str
+    file: str
+    method: str
+
+
+class JobResult(NamedTuple):
+    job: JobSpec
+    total: int
+    completed: int
+    failures: int
+    messages: List[str]
+    error: Optional[str] = None
+    failure_report: Optional[str] = None
+    # Per-client stats when the job ran on more than one API client.
+    client_stats: Optional[List[dict]] = None
+
+
+def load_manifest(path: str) -> List[JobSpec]:
+    with open(path, encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
+    entries = manifest.get("jobs", []) if isinstance(manifest, dict) else manifest
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for number, entry in enumerate(entries, start=1):
+        method = METHODS.get(str(entry.get("method", "add")).lower())
+        if method is None or not entry.get("event") or not entry.get("file"):
+            raise ValueError(f"Invalid manifest entry {number}: {entry!r}")
+        jobs.append(JobSpec(str(entry["event"]), os.path.join(base_dir, entry["file"]), method))
+    return jobs
+
+
+class JobStream:
+    # Reads a job's input on a background thread and hands the work items to the
+    # engine in batches through a WorkFeed, so the token fetch (done by the engine)
+    # and parsing overlap and dispatch starts with the first rows read.
+    def __init__(self, job: JobSpec, token_source, options: dict, batch_size: int = 2000,
+                 on_rows_read: Callable[[int, bool], None] = None, on_message: Callable[[str], None] = None,
+                 journal_key: str = None):
+        from data_processor import API_BASE_URL, DataProcessor
+        from resume_journal import ResumeJournal
+        from work_feed import WorkFeed
+
+        self.job = job
+        self.token_source = token_source
+        self.options = options
+        self.batch_size = batch_size
+        self.on_rows_read = on_rows_read or _ignore
+        self.on_message = on_message or _ignore
+        self.messages = []
+
+        self.api_base_url = options.get("api_base_url") or API_BASE_URL
+        self.data_processor = DataProcessor(job.event_id, api_base_url=self.api_base_url)
+        self.format_link = self.data_processor.format_link
+        self.feed = WorkFeed()
+        self.resume = options.get("resume", False)
+        # Appending leaves earlier records readable for load_completed; without resume
+        # nothing is read from the old journal. Records only start once items are fed.
+        try:
+            self.journal_path = ResumeJournal.path_for(job.file, job.event_id, job.method, journal_key)
+            self.journal = ResumeJournal(self.journal_path, append=self.resume)
+        except OSError as e:
+            # The job still runs, it just can't be resumed.
+            self.journal_path = self.journal = None
+            self.resume = False
+            self._message(f"Resume journal not available ({type(e).__name__}: {e}); this run can't be resumed.")
+        self._thread = threading.Thread(target=self._read_input, name="input-reader", daemon=True)
+
+    def start(self) -> 'JobStream':
+        self._thread.start()
+        return self
+
+    def _message(self, message: str):
+        self.messages.append(message)
+        self.on_message(message)
+
+    def _read_input(self):
+        from resume_journal import ResumeJournal
+
+        try:
+            if self.job.method == PLAN:
+                items = self._plan_items()
+            else:
+                completed = ResumeJournal.load_completed(self.journal_path, self.job.method) if self.resume else None
+                if completed:
+                    self._message(f"Resuming: {len(completed)} registrations already completed.")
+
+                items = self.data_processor.iter_file_data(self.job.file)
+                if self.options.get("diff"):
+                    items = self._plan_delta()
+                    if items is None:
+                        self.feed.finish("Failed to obtain access token.")
+                        return
+                items = self.data_processor.skip_completed(items, completed)
+
+            batch = []
+            for item in items:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    if not self.feed.put(batch):
+                        return
+                    self.on_rows_read(self.feed.total, False)
+                    batch = []
+            if batch and not self.feed.put(batch):
+                return
+            self.feed.finish()
+        except Exception as e:
+            self.feed.finish(f"Could not read {self.job.file}: {type(e).__name__}: {e}")
+        self.on_rows_read(self.feed.total, True)
+
+    def _plan_items(self):
+        from job_plan import iter_plan_items, skip_completed
+        from resume_journal import ResumeJournal
+
+        items = iter_plan_items(self.job.file)
+        if self.options.get("diff"):
+            self._message("Diff: not available for job plans, sending every row.")
+        if not self.resume:
+            return items
+        # Plan rows are journaled per request, so completed adds and removals are
+        # loaded separately.
+        completed = {method: ResumeJournal.load_completed(self.journal_path, method) for method in ("PUT", "DELETE")}
+        count = len(completed["PUT"]) + len(completed["DELETE"])
+        if count:
+            self._message(f"Resuming: {count} requests already completed.")
+        return skip_completed(items, completed)
+
+    def _plan_delta(self):
+        from registration_planner import RegistrationPlanner
+
+        # The diff needs the whole input and a token before anything can be sent.
+        access_token = self.token_source.get()
+        if not access_token:
+            return None
+        planner = RegistrationPlanner(access_token, self.job.event_id, api_base_url=self.api_base_url,
+                                      transport=self.options.get("transport"), cancelled=lambda: self.feed.closed)
+        data_dict = planner.plan(self.data_processor.process_file_data(self.job.file), self.job.method)
+        self._message(f"Diff: {planner.skipped} registrations already up to date.")
+        if planner.unavailable_sessions:
+            self._message(f"Diff: could not fetch sessions {planner.unavailable_sessions}, sending them in full.")
+        return self.data_processor.iter_pairs(data_dict)
+
+
+_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def run_job(index: int, job: JobSpec, credentials: Tuple[Sequence[Tuple[str, str]], str],
+            options: dict) -> JobResult:
+    from credential_pool import credential_pool_for
+    from rate_limiter import rate_limiter_for
+    from request_engine import RequestEngine
+    from token_provider import TokenManager
+
+    clients, account_id = credentials
+    token_manager = TokenManager(auth_url=options["auth_url"]) if options.get("auth_url") else TokenManager()
+    pool = credential_pool_for(token_manager, clients, account_id)
+    # Entries of a manifest may repeat the same file, event and method, so each job
+    # keeps its own journal.
+    stream = JobStream(job, pool.credentials[0].token_source, options, journal_key=f"job{index}",
+                       on_rows_read=lambda total, finished: _progress_queue.put((index, None, total))).start()
+
+    # Failures stream to a per-job CSV that the parent merges into the final report.
+    descriptor, failure_report = tempfile.mkstemp(prefix=f"failed-{job.event_id}-", suffix=".csv")
+    os.close(descriptor)
+    failures = 0
+    try:
+        engine = RequestEngine(None, stream.feed, stream.format_link, request_method=job.method,
+                               max_concurrent_requests=options.get("max_concurrent_requests", 25),
+                               adaptive_concurrency=options.get("adaptive_concurrency", False),
+                               credentials=pool, journal=stream.journal, failed_output=failure_report,
+                               # Jobs run in separate worker processes, so the account's
+                               # rate limit has to be shared through the file-backed bucket.
+                               rate_limiter=rate_limiter_for(account_id, options.get("rate_limit"), shared=True),
+                               fair_scheduling=options.get("fair_scheduling", True),
+                               per_session_limit=options.get("per_session_limit"),
+                               on_progress=lambda completed: _progress_queue.put((index, completed, None)))
+        engine.run()
+        failures = len(engine.failed_requests)
+    finally:
+        # A job that raised leaves no report behind for write_report to clean up.
+        if not failures:
+            os.remove(failure_report)
+            failure_report = None
+    return JobResult(job, stream.feed.total, engine.completed_requests, failures, stream.messages,
+                     error=engine.error, failure_report=failure_report,
+                     client_stats=pool.stats() if len(pool) > 1 else None)
+
+
+class ManifestRunner:
+    # credentials is the list of (client_id, client_secret) API clients and the account id.
+    def __init__(self, credentials: Tuple[Sequence[Tuple[str, str]], str], options: dict = None,
+                 max_workers: int = None, on_progress: Callable[[int, int], None] = None,
+                 on_job_finished: Callable[[JobResult], None] = None):
+        self.credentials = credentials
+        self.options = options or {}
+        self.max_workers = max_workers
+        self.on_progress = on_progress
+        self.on_job_finished = on_job_finished
+        self._job_progress = {}
+
+    def run(self, jobs: List[JobSpec]) -> List[JobResult]:
+        # Each job runs its own ingestion and dispatch loop in a separate process;
+        # only small (job, completed, total) tuples travel back for the combined view.
+        progress_queue = multiprocessing.Queue()
+        results = [None] * len(jobs)
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(progress_queue,)) as executor:
+            futures = {executor.submit(run_job, index, job, self.credentials, self.options): index
+                       for index, job in enumerate(jobs)}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                self._drain_progress(progress_queue)
+                for future in done:
+                    index = futures[future]
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        results[index] = JobResult(jobs[index], 0, 0, 0, [], error=f"{type(e).__name__}: {e}")
+                    if self.on_job_finished is not None:
+                        self.on_job_finished(results[index])
+        # Only once the workers have exited is everything they queued readable.
+        self._drain_progress(progress_queue)
+        return results
+
+    def _drain_progress(self, progress_queue):
+        updated = False
+        while True:
+            try:
+                index, completed, total = progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            # Workers report rows read and requests completed separately; None keeps
+            # the last value of the other.
+            previous_completed, previous_total = self._job_progress.get(index, (0, 0))
+            self._job_progress[index] = (previous_completed if completed is None else completed,
+                                         previous_total if total is None else total)
+            updated = True
+
+        if updated and self.on_progress is not None:
+            completed = sum(progress[0] for progress in self._job_progress.values())
+            total = sum(progress[1] for progress in self._job_progress.values())
+            self.on_progress(completed, total)
+
+
+def write_report(results: List[JobResult], path: str):
+    # One report for the whole manifest, in the format of its extension. The job of
+    # each row follows the standard columns, so the report still reads as the input
+    # (or plan) of a retry job.
+    from failed_request_handler import REPORT_FIELDS, ReportWriter, read_report_rows
+
+    writer = ReportWriter(path, REPORT_FIELDS + ("event_id", "file", "method"))
+    try:
+        for result in results:
+            if result.failure_report is None:
+                continue
+            for row in read_report_rows(result.failure_report):
+                writer.write(row + (result.job.event_id, result.job.file, result.job.method))
+    finally:
+        writer.close()
+    discard_reports(results)
+
+
+def discard_reports(results: List[JobResult]):
+    for result in results:
+        if result.failure_report is not None and os.path.exists(result.failure_report):
+            os.remove(result.failure_report)
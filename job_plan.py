@@ -0,0 +1,168 @@
+import csv
+import json
+from array import array
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from data_processor import WorkItems
+from input_readers import TicketId, detect_format, format_ticket_id, parse_ticket_id
+
+# request_method of a job whose rows each carry their own operation.
+PLAN = "PLAN"
+MOVE = "MOVE"
+
+OPERATIONS = {
+    "add": "PUT",
+    "put": "PUT",
+    "remove": "DELETE",
+    "delete": "DELETE",
+    "move": MOVE,
+}
+
+# Names used in failure reports, so a report can be run again as a plan.
+OPERATION_NAMES = {"PUT": "add", "DELETE": "remove", MOVE: "move"}
+
+_OPERATION_CODES = {"PUT": 0, "DELETE": 1, MOVE: 2}
+_OPERATIONS_BY_CODE = ("PUT", "DELETE", MOVE)
+
+# Column names are matched case-insensitively; camelCase is accepted too.
+_COLUMNS = {
+    "operation": "operation",
+    "session_id": "session_id",
+    "sessionid": "session_id",
+    "ticket_id": "ticket_id",
+    "ticketid": "ticket_id",
+    "to_session_id": "to_session_id",
+    "tosessionid": "to_session_id",
+}
+
+PlanItem = Tuple[int, TicketId, str, Optional[int]]
+
+
+class PlanItems(WorkItems):
+    # (session_id, ticket_id, operation, to_session_id) rows, packed like WorkItems
+    # with one byte for the operation and the destination session of a move.
+    __slots__ = ("operations", "to_session_ids")
+
+    def __init__(self, items: Iterable[PlanItem] = ()):
+        self.operations = bytearray()
+        self.to_session_ids = array("q")
+        super().__init__(items)
+
+    def append(self, session_id: int, ticket_id: TicketId, operation: str = "PUT", to_session_id: int = None):
+        super().append(session_id, ticket_id)
+        self.operations.append(_OPERATION_CODES[operation])
+        self.to_session_ids.append(to_session_id or 0)
+
+    def __getitem__(self, index: int) -> PlanItem:
+        session_id, ticket_id = super().__getitem__(index)
+        return session_id, ticket_id, _OPERATIONS_BY_CODE[self.operations[index]], self.to_session_ids[index] or None
+
+    def __iter__(self) -> Iterator[PlanItem]:
+        operations = self.operations
+        to_session_ids = self.to_session_ids
+        for index, (session_id, ticket_id) in enumerate(super().__iter__()):
+            yield session_id, ticket_id, _OPERATIONS_BY_CODE[operations[index]], to_session_ids[index] or None
+
+
+def plan_steps(item: PlanItem) -> Tuple[Tuple[str, int], ...]:
+    # The (method, session_id) requests behind one plan row, in the order they must
+    # be sent. A move removes the ticket from its session before adding it to the
+    # new one.
+    session_id, ticket_id, operation, to_session_id = item
+    if operation == MOVE:
+        return ("DELETE", session_id), ("PUT", to_session_id)
+    return (operation, session_id),
+
+
+def iter_plan_items(file_path: str) -> Iterator[PlanItem]:
+    # A plan is a long-layout file with an operation column (add, remove or move)
+    # next to session_id and ticket_id, plus to_session_id for moves. Columns are
+    # found by name, so failure reports of earlier runs can be used as plans.
+    input_format = detect_format(file_path)
+    if input_format == "xlsx":
+        records = _excel_records(file_path)
+    elif input_format == "jsonl":
+        records = _jsonl_records(file_path)
+    else:
+        records = _delimited_records(file_path, "\t" if input_format == "tsv" else ",")
+
+    for number, record in records:
+        if record.get("session_id") in (None, "") or record.get("ticket_id") in (None, ""):
+            continue
+        operation = OPERATIONS.get(str(record.get("operation") or "").strip().lower())
+        if operation is None:
+            raise ValueError(f"{file_path}:{number}: unknown operation {record.get('operation')!r}")
+        to_session_id = record.get("to_session_id")
+        if operation == MOVE:
+            if to_session_id in (None, ""):
+                raise ValueError(f"{file_path}:{number}: a move needs a to_session_id")
+            to_session_id = int(to_session_id)
+        else:
+            to_session_id = None
+        yield int(record["session_id"]), record["ticket_id"], operation, to_session_id
+
+
+def _column_names(header) -> list:
+    return [_COLUMNS.get(str(name or "").strip().lower()) for name in header]
+
+
+def _delimited_records(file_path: str, delimiter: str) -> Iterator[Tuple[int, Dict[str, object]]]:
+    with open(file_path, newline="", encoding="utf-8-sig") as input_file:
+        rows = csv.reader(input_file, delimiter=delimiter)
+        columns = _column_names(next(rows, []))
+        for number, row in enumerate(rows, start=2):
+            record = {column: value.strip() for column, value in zip(columns, row) if column is not None}
+            if record.get("ticket_id"):
+                record["ticket_id"] = parse_ticket_id(record["ticket_id"])
+            yield number, record
+
+
+def _excel_records(file_path: str) -> Iterator[Tuple[int, Dict[str, object]]]:
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows()
+        columns = _column_names(cell.value for cell in next(rows, ()))
+        for number, row in enumerate(rows, start=2):
+            record = {column: cell.value for column, cell in zip(columns, row) if column is not None}
+            ticket_cell = row[columns.index("ticket_id")] if "ticket_id" in columns else None
+            if ticket_cell is not None and ticket_cell.value is not None:
+                record["ticket_id"] = format_ticket_id(ticket_cell.value, ticket_cell.number_format)
+            yield number, record
+    finally:
+        workbook.close()
+
+
+def _jsonl_records(file_path: str) -> Iterator[Tuple[int, Dict[str, object]]]:
+    with open(file_path, encoding="utf-8-sig") as input_file:
+        for number, line in enumerate(input_file, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"{file_path}:{number}: expected a plan record, got {line.strip()!r}")
+            record = {_COLUMNS.get(key.lower()): value for key, value in record.items()}
+            ticket_id = record.get("ticket_id")
+            if isinstance(ticket_id, str):
+                record["ticket_id"] = parse_ticket_id(ticket_id)
+            elif ticket_id is not None:
+                record["ticket_id"] = format_ticket_id(ticket_id)
+            yield number, record
+
+
+def skip_completed(items: Iterable[PlanItem], completed: Dict[str, Set[Tuple[int, str]]]) -> Iterator[PlanItem]:
+    # completed maps each method to the (session_id, ticket_id) keys a resumed run's
+    # journal lists as done. A move whose removal already went through only has the
+    # add left to do.
+    for item in items:
+        session_id, ticket_id, operation, to_session_id = item
+        key = str(ticket_id)
+        if operation == MOVE:
+            if (to_session_id, key) in completed["PUT"]:
+                continue
+            if (session_id, key) in completed["DELETE"]:
+                item = (to_session_id, ticket_id, "PUT", None)
+        elif (session_id, key) in completed[operation]:
+            continue
+        yield item
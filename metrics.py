@@ -0,0 +1,189 @@
+import json
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+# Log-spaced latency buckets from 1 ms to ~36 s, fine enough to read a p95 off them.
+DEFAULT_BUCKETS = tuple(round(0.001 * 1.25 ** power, 6) for power in range(48))
+
+PHASES = ("queue_wait", "rate_limit_wait", "connect", "ttfb", "total")
+
+
+class Histogram:
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: 'Histogram'):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+
+    def percentile(self, fraction: float) -> float:
+        if self.count == 0:
+            return 0.0
+
+        target = fraction * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= target:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (target - cumulative) / count
+            cumulative += count
+        return self.bounds[-1]
+
+
+class RollingWindow:
+    def __init__(self, seconds: int = 10):
+        self.seconds = seconds
+        self._slots = deque()
+        self._first = None
+
+    def observe(self, value: float, now: float):
+        if self._first is None:
+            self._first = now
+        second = int(now)
+        if not self._slots or self._slots[-1][0] != second:
+            self._slots.append((second, Histogram()))
+        self._slots[-1][1].observe(value)
+        self._expire(now)
+
+    def rate(self, now: float) -> float:
+        self._expire(now)
+        if self._first is None:
+            return 0.0
+        # Until a full window has passed, the samples only cover the time since the
+        # first one (at least a second, the window's resolution).
+        span = max(1.0, min(self.seconds, now - self._first))
+        return sum(histogram.count for _, histogram in self._slots) / span
+
+    def percentile(self, fraction: float, now: float) -> float:
+        self._expire(now)
+        merged = Histogram()
+        for _, histogram in self._slots:
+            merged.merge(histogram)
+        return merged.percentile(fraction)
+
+    def _expire(self, now: float):
+        oldest = int(now) - self.seconds
+        while self._slots and self._slots[0][0] <= oldest:
+            self._slots.popleft()
+
+
+class RequestMetrics:
+    def __init__(self, window_seconds: int = 10):
+        self.histograms = {phase: Histogram() for phase in PHASES}
+        self.status_counts = Counter()
+        self.window = RollingWindow(window_seconds)
+        self.started = time.monotonic()
+        # Per-client stats when a job spreads over several API clients (see credential_pool).
+        self.credentials = []
+
+    def observe(self, timings: dict, status: int):
+        for phase in PHASES:
+            if phase in timings:
+                self.histograms[phase].observe(timings[phase])
+        self.status_counts[status] += 1
+        if "total" in timings:
+            self.window.observe(timings["total"], time.monotonic())
+
+    def live(self) -> Tuple[float, float]:
+        now = time.monotonic()
+        return self.window.rate(now), self.window.percentile(0.95, now)
+
+    def snapshot(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        total = self.histograms["total"]
+        snapshot = {
+            "elapsed_seconds": round(elapsed, 3),
+            "requests": total.count,
+            "requests_per_second": round(total.count / elapsed, 2) if elapsed else 0.0,
+            "status_counts": {str(status): count for status, count in sorted(self.status_counts.items())},
+            "phases": {
+                phase: {
+                    "count": histogram.count,
+                    "mean_ms": round(histogram.sum / histogram.count * 1000, 2) if histogram.count else 0.0,
+                    "p50_ms": round(histogram.percentile(0.50) * 1000, 2),
+                    "p95_ms": round(histogram.percentile(0.95) * 1000, 2),
+                    "p99_ms": round(histogram.percentile(0.99) * 1000, 2),
+                }
+                for phase, histogram in self.histograms.items()
+            },
+        }
+        if self.credentials:
+            snapshot["credentials"] = self.credentials
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for phase, histogram in self.histograms.items():
+            name = f"sessionreg_request_{phase}_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum {histogram.sum}")
+            lines.append(f"{name}_count {histogram.count}")
+
+        lines.append("# TYPE sessionreg_responses_total counter")
+        for status, count in sorted(self.status_counts.items()):
+            lines.append(f'sessionreg_responses_total{{status="{status}"}} {count}')
+
+        if self.credentials:
+            for name in ("requests", "throttled", "errors"):
+                lines.append(f"# TYPE sessionreg_client_{name}_total counter")
+                for entry in self.credentials:
+                    lines.append(f'sessionreg_client_{name}_total{{client="{entry["client"]}"}} {entry[name]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str):
+        # .prom/.txt files get the Prometheus text format, anything else JSON.
+        if path.endswith((".prom", ".txt")):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), indent=2)
+        with open(path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(content)
+
+
+def request_timing_trace_config() -> aiohttp.TraceConfig:
+    # Fills the per-request timings dict passed as trace_request_ctx; requests sent
+    # without one cost only the None check.
+    async def on_request_start(session, context, params):
+        if context.trace_request_ctx is not None:
+            context.trace_request_ctx["sent"] = time.monotonic()
+
+    async def on_connection_create_start(session, context, params):
+        if context.trace_request_ctx is not None:
+            context.trace_request_ctx["connect_started"] = time.monotonic()
+
+    async def on_connection_create_end(session, context, params):
+        timings: Optional[Dict[str, float]] = context.trace_request_ctx
+        if timings is not None and "connect_started" in timings:
+            timings["connect"] = time.monotonic() - timings["connect_started"]
+
+    async def on_request_end(session, context, params):
+        timings = context.trace_request_ctx
+        if timings is not None and "sent" in timings:
+            timings["ttfb"] = time.monotonic() - timings["sent"]
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
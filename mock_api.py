@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+
+from aiohttp import web
+
+
+class MockBizzaboAPI:
+    def __init__(self, latency: float = 0.02, latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: float = None, retry_after: float = 1.0, token_expires_in: int = 3600, seed: int = None):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.token_expires_in = token_expires_in
+
+        self.registrations = defaultdict(set)
+        self.status_counts = Counter()
+        self.tokens_issued = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+        self._random = random.Random(seed)
+        # Like the real API, the rate limit applies to each API client separately.
+        self._buckets = {}
+        self._runner = None
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/oauth/token", self.issue_token)
+        app.router.add_get("/v1/events/{event_id}/agenda/sessions/{session_id}/registrations",
+                           self.list_registrations)
+        app.router.add_put("/v1/events/{event_id}/agenda/sessions/{session_id}/registrations/{ticket_id}",
+                           self.add_registration)
+        app.router.add_delete("/v1/events/{event_id}/agenda/sessions/{session_id}/registrations/{ticket_id}",
+                              self.remove_registration)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def issue_token(self, request):
+        self.tokens_issued += 1
+        client_id = (await request.post()).get("client_id", "client")
+        return web.json_response({"access_token": f"mock-token-{client_id}-{self.tokens_issued}",
+                                  "expires_in": self.token_expires_in})
+
+    async def list_registrations(self, request):
+        page = int(request.query.get("page", 0))
+        size = int(request.query.get("size", 100))
+        key = (request.match_info["event_id"], int(request.match_info["session_id"]))
+        tickets = sorted(self.registrations[key])
+        total_pages = (len(tickets) + size - 1) // size
+        content = [{"ticketId": ticket_id} for ticket_id in tickets[page * size:(page + 1) * size]]
+        return web.json_response({"content": content,
+                                  "page": {"size": size, "number": page, "totalElements": len(tickets),
+                                           "totalPages": total_pages}})
+
+    async def add_registration(self, request):
+        return await self._handle_registration(request, add=True)
+
+    async def remove_registration(self, request):
+        return await self._handle_registration(request, add=False)
+
+    async def _handle_registration(self, request, add: bool):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = await self._registration_response(request, add)
+        finally:
+            self.in_flight -= 1
+        self.status_counts[response.status] += 1
+        return response
+
+    async def _registration_response(self, request, add: bool) -> web.Response:
+        authorization = request.headers.get("Authorization", "")
+        if not authorization.startswith("Bearer "):
+            return web.json_response({"error": "unauthorized"}, status=401)
+        # Tokens look like mock-token-<client_id>-<n>.
+        if not self._take_rate_token(authorization[len("Bearer "):].rsplit("-", 1)[0]):
+            return web.json_response({"error": "too_many_requests"}, status=429,
+                                     headers={"Retry-After": str(self.retry_after)})
+
+        await asyncio.sleep(max(0.0, self.latency + self._random.uniform(-1, 1) * self.latency_jitter))
+        if self._random.random() < self.error_rate:
+            return web.json_response({"error": "internal_error"}, status=500)
+
+        key = (request.match_info["event_id"], int(request.match_info["session_id"]))
+        ticket_id = int(request.match_info["ticket_id"])
+        if add:
+            self.registrations[key].add(ticket_id)
+        else:
+            self.registrations[key].discard(ticket_id)
+        return web.json_response({"sessionId": key[1], "ticketId": ticket_id})
+
+    def _take_rate_token(self, client: str) -> bool:
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(client, (self.rate_limit, now))
+        tokens = min(self.rate_limit, tokens + (now - updated) * self.rate_limit)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            return False
+        self._buckets[client] = (tokens - 1, now)
+        return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m mock_api", description="Local stand-in for the Bizzabo API.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None, help="requests per second per API client before 429s")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--token-expires-in", type=int, default=3600)
+    args = parser.parse_args(argv)
+
+    api = MockBizzaboAPI(latency=args.latency, latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+                         rate_limit=args.rate_limit, retry_after=args.retry_after,
+                         token_expires_in=args.token_expires_in)
+    web.run_app(api.create_app(), host="127.0.0.1", port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: processes can't share a bucket, threads still do.
+    fcntl = None
+
+
+class TokenBucket:
+    # Requests reserve a token up front; when the bucket is empty the balance goes
+    # negative and the caller sleeps until its token has been refilled. Reserving
+    # instead of polling keeps callers in FIFO order and needs only a plain lock, so
+    # engines running on different event loops can share one bucket.
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, wait = self._take(self._tokens, now - self._updated)
+            self._updated = now
+        return wait
+
+    def refund(self):
+        # Gives back a token that was reserved for a request that wasn't sent.
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def _take(self, tokens: float, elapsed: float) -> Tuple[float, float]:
+        tokens = min(self.burst, tokens + max(0.0, elapsed) * self.rate) - 1
+        return tokens, (-tokens / self.rate if tokens < 0 else 0.0)
+
+    async def acquire(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class FileTokenBucket(TokenBucket):
+    # Same bucket, with its state kept in a small file guarded by flock, so separate
+    # processes on one host (manifest workers, several app instances) share the quota.
+    _STATE = struct.Struct("dd")
+
+    def __init__(self, path: str, rate: float, burst: float = None):
+        super().__init__(rate, burst)
+        self.path = path
+
+    def reserve(self) -> float:
+        return self._update(lambda tokens, updated, now: self._take(tokens, now - updated) + (now,))
+
+    def refund(self):
+        self._update(lambda tokens, updated, now: (min(self.burst, tokens + 1), None, updated))
+
+    def _update(self, change):
+        # change(tokens, updated, now) returns the new (tokens, result, updated).
+        with self._lock, open(self.path, "a+b") as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                state_file.seek(0)
+                data = state_file.read(self._STATE.size)
+                # Wall-clock time, since monotonic clocks aren't comparable across processes.
+                now = time.time()
+                tokens, updated = self._STATE.unpack(data) if len(data) == self._STATE.size else (self.burst, now)
+                tokens, result, updated = change(tokens, updated, now)
+                state_file.seek(0)
+                state_file.truncate()
+                state_file.write(self._STATE.pack(tokens, updated))
+                state_file.flush()
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+        return result
+
+
+_buckets: Dict[Tuple[str, bool], TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def shared_state_path(account_id: str) -> str:
+    digest = hashlib.sha1(account_id.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"sessionreg-rate-{digest}.bucket")
+
+
+def rate_limiter_for(account_id: str, rate: float, burst: float = None,
+                     shared: bool = False) -> Optional[TokenBucket]:
+    # One bucket per account for the whole process, so every job against the account
+    # draws from the same quota. With shared=True the bucket also spans processes.
+    if not rate:
+        return None
+
+    shared = shared and fcntl is not None
+    with _buckets_lock:
+        bucket = _buckets.get((account_id, shared))
+        if bucket is None:
+            if shared:
+                bucket = FileTokenBucket(shared_state_path(account_id), rate, burst)
+            else:
+                bucket = TokenBucket(rate, burst)
+            _buckets[(account_id, shared)] = bucket
+        else:
+            # The most recent job's setting applies to everyone using the account.
+            bucket.rate = float(rate)
+            bucket.burst = float(burst if burst is not None else max(1.0, rate))
+        return bucket
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+import aiohttp
+
+from data_processor import API_BASE_URL
+from retry_policy import RetryPolicy
+from transport import HttpTransport
+
+
+class RegistrationPlanner:
+    def __init__(self, access_token: str, event_id: str, api_base_url: str = API_BASE_URL, page_size: int = 200,
+                 max_concurrent_requests: int = 10, retry_policy: RetryPolicy = None, transport: HttpTransport = None,
+                 cancelled: Callable[[], bool] = None):
+        self.access_token = access_token
+        self.event_id = event_id
+        self.api_base_url = api_base_url
+        self.page_size = page_size
+        self.max_concurrent_requests = max_concurrent_requests
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.transport = transport
+        # Checked before every page request, so a cancelled job stops fetching.
+        self.cancelled = cancelled or (lambda: False)
+        self.skipped = 0
+        self.unavailable_sessions = []
+
+    def plan(self, data_dict: Dict[int, list], request_method: str) -> Dict[int, list]:
+        transport = self.transport or HttpTransport(limit_per_host=self.max_concurrent_requests)
+        try:
+            registered = transport.run(self.fetch_all_registrations(transport, list(data_dict)))
+        finally:
+            if transport is not self.transport:
+                transport.close()
+        return self.compute_delta(data_dict, registered, request_method)
+
+    def compute_delta(self, data_dict: Dict[int, list], registered: Dict[int, Set[int]],
+                      request_method: str) -> Dict[int, list]:
+        # PUT only needs tickets that aren't registered yet, DELETE only those that
+        # still are. Sessions whose registrations couldn't be fetched are sent as-is.
+        keep_registered = request_method == "DELETE"
+        delta = {}
+        for session_id, ticket_ids in data_dict.items():
+            existing = registered.get(session_id)
+            if existing is None:
+                delta[session_id] = list(ticket_ids)
+                continue
+
+            kept = []
+            for ticket_id in ticket_ids:
+                key = self._ticket_key(ticket_id)
+                if key is None or (key in existing) == keep_registered:
+                    kept.append(ticket_id)
+            self.skipped += len(ticket_ids) - len(kept)
+            if kept:
+                delta[session_id] = kept
+        return delta
+
+    async def fetch_all_registrations(self, transport: HttpTransport, session_ids: List[int]) -> Dict[int, Set[int]]:
+        session = await transport.get_session(self.max_concurrent_requests)
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+        async def fetch(session_id):
+            async with semaphore:
+                return await self.fetch_registrations(session, session_id)
+
+        results = await asyncio.gather(*(fetch(session_id) for session_id in session_ids))
+
+        registered = {}
+        for session_id, ticket_ids in zip(session_ids, results):
+            if ticket_ids is None:
+                self.unavailable_sessions.append(session_id)
+            else:
+                registered[session_id] = ticket_ids
+        return registered
+
+    async def fetch_registrations(self, session, session_id: int) -> Optional[Set[int]]:
+        registered = set()
+        page = 0
+        while True:
+            data = await self._get_page(session, session_id, page)
+            if data is None:
+                return None
+
+            items = (data.get("content") if isinstance(data, dict) else data) or []
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                ticket_id = self._ticket_key(item.get("ticketId", item.get("id")))
+                if ticket_id is not None:
+                    registered.add(ticket_id)
+
+            page += 1
+            page_info = data.get("page") if isinstance(data, dict) else None
+            total_pages = page_info.get("totalPages") if isinstance(page_info, dict) else None
+            if total_pages is not None:
+                if page >= total_pages:
+                    return registered
+            elif len(items) < self.page_size:
+                return registered
+
+    async def _get_page(self, session, session_id: int, page: int):
+        url = f"{self.api_base_url}/v1/events/{self.event_id}/agenda/sessions/{session_id}/registrations"
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        params = {"page": page, "size": self.page_size}
+
+        attempt = 1
+        started = time.monotonic()
+        while True:
+            if self.cancelled():
+                return None
+            try:
+                async with session.get(url, headers=headers, params=params) as response:
+                    if response.status == 200:
+                        return await response.json(content_type=None)
+                    status, retry_after = response.status, response.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                status, retry_after = 0, None
+            except RuntimeError:
+                # The session was closed underneath us: the job was cancelled or the
+                # app is shutting down.
+                return None
+
+            delay = self.retry_policy.next_delay(status, attempt, time.monotonic() - started, retry_after)
+            if delay is None:
+                return None
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _ticket_key(ticket_id) -> Optional[int]:
+        try:
+            return int(ticket_id)
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,571 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Iterable, List, Tuple
+
+import aiohttp
+
+from concurrency_limiter import AdaptiveConcurrencyLimiter
+from credential_pool import Credential, CredentialPool
+from data_processor import WorkItems
+from failed_request_handler import FailedRequests
+from input_readers import TicketId
+from job_plan import MOVE, OPERATION_NAMES, PLAN, PlanItems, plan_steps
+from metrics import RequestMetrics
+from rate_limiter import TokenBucket
+from response_policy import ResponsePolicy
+from resume_journal import ResumeJournal
+from retry_policy import RetryPolicy
+from scheduler import FairScheduler
+from token_provider import TokenSource
+from transport import HttpTransport
+from work_feed import WorkFeed
+
+
+def _ignore(*args):
+    pass
+
+
+class RequestEngine:
+    def __init__(self, access_token: str, work_items: Iterable[Tuple[int, TicketId]],
+                 format_link: Callable[[int, TicketId], str], request_method: str = "PUT", max_concurrent_requests: int = 25,
+                 adaptive_concurrency: bool = False, max_adaptive_requests: int = 100, retry_policy: RetryPolicy = None,
+                 token_source: TokenSource = None, transport: HttpTransport = None,
+                 result_batch_size: int = 500, result_flush_interval: float = 0.25,
+                 on_progress: Callable[[int], None] = _ignore, on_results: Callable[[List[tuple]], None] = _ignore,
+                 on_concurrency: Callable[[int], None] = _ignore, journal: ResumeJournal = None,
+                 metrics: RequestMetrics = None, metrics_path: str = None, metrics_interval: float = 10.0,
+                 on_metrics: Callable[[float, float], None] = _ignore, failed_output: str = None,
+                 rate_limiter: TokenBucket = None, cancel_deadline: float = 5.0,
+                 response_policy: ResponsePolicy = None, fair_scheduling: bool = True,
+                 per_session_limit: int = None, credentials: CredentialPool = None):
+        self.access_token = access_token
+        # Work items stay compact (session_id, ticket_id) pairs until the moment they
+        # are sent; the URL is only formatted for the request itself.
+        self.work_items = work_items
+        self.format_link = format_link
+        # With PLAN, each work item carries its own operation (see job_plan).
+        self.request_method = request_method
+        self.plan = request_method == PLAN
+        self._max_concurrent_requests = max_concurrent_requests
+        self._adaptive_concurrency = adaptive_concurrency
+        self._max_adaptive_requests = max_adaptive_requests
+        self._limiter = None
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.token_source = token_source
+        # Several API clients can share the job; a single token or token source is
+        # a pool of one.
+        self.credentials = credentials or CredentialPool([Credential(token_source, access_token)])
+        self.transport = transport
+        self.result_batch_size = result_batch_size
+        self.result_flush_interval = result_flush_interval
+        self.on_progress = on_progress
+        self.on_results = on_results
+        self.on_concurrency = on_concurrency
+        self.journal = journal
+        self.metrics = metrics if metrics is not None or metrics_path is None else RequestMetrics()
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        self.on_metrics = on_metrics
+        self._pending_results = []
+        self._reported_requests = 0
+        self._completed_requests = 0
+        self.failed_requests = FailedRequests(failed_output)
+        self.cancel_deadline = cancel_deadline
+        self.response_policy = response_policy or ResponsePolicy()
+        self.fair_scheduling = fair_scheduling or per_session_limit is not None
+        self.per_session_limit = per_session_limit
+        self._scheduler = None
+        self._feed = work_items if isinstance(work_items, WorkFeed) else None
+        self.error = None
+        self.running = True
+        self.paused = False
+        self._loop = None
+        self._all_requests_done = None
+
+    @property
+    def completed_requests(self) -> int:
+        return self._completed_requests
+
+    def run(self):
+        transport = self.transport or HttpTransport(limit_per_host=self._max_concurrent_requests)
+        complete = False
+        try:
+            # Fetched here, off the caller's thread, while the input is still being read.
+            try:
+                authenticated = self.credentials.fetch_tokens()
+            except Exception as e:
+                self.error = f"Failed to obtain access token: {type(e).__name__}: {e}"
+                authenticated = False
+            if not authenticated:
+                # Cancelling also closes the feed, so its reader thread stops.
+                self.error = self.error or "Failed to obtain access token."
+                self.cancel()
+                return
+
+            future = transport.submit(self.run_concurrent_requests(transport))
+            try:
+                future.result()
+            except KeyboardInterrupt:
+                # Wind the job down within the cancel deadline before the journal,
+                # the failure report and the transport are closed underneath it.
+                self.cancel()
+                future.result()
+                raise
+            if self._feed is not None and self._feed.error:
+                self.error = self._feed.error
+            complete = self.error is None and self.running and not len(self.failed_requests)
+        finally:
+            if transport is not self.transport:
+                transport.close()
+            if self.journal is not None:
+                self.journal.close()
+                if complete:
+                    # Everything went through; there is nothing left to resume.
+                    self.journal.discard()
+            self.failed_requests.close()
+            if self.metrics_path is not None:
+                self.export_metrics()
+
+    async def run_concurrent_requests(self, transport: HttpTransport):
+        # A fixed pool of workers pulls from a bounded queue, so the number of live
+        # tasks and queued URLs depends on the concurrency level, not the job size.
+        worker_count = self._max_concurrent_requests
+        if self._adaptive_concurrency:
+            # The pool is sized for the ceiling; the limiter decides how many of the
+            # workers may actually have a request in flight.
+            worker_count = max(self._max_adaptive_requests, self._max_concurrent_requests)
+            self._limiter = AdaptiveConcurrencyLimiter(initial_limit=self._max_concurrent_requests,
+                                                       max_limit=worker_count,
+                                                       on_limit_change=self.on_concurrency)
+        self.on_concurrency(self._max_concurrent_requests)
+
+        queue = asyncio.Queue(maxsize=worker_count * 2)
+        self._loop = asyncio.get_running_loop()
+        self._queue = queue
+        self._resumed = asyncio.Event()
+        self._apply_pause()
+        self._aborted = False
+        self._abort_handle = None
+        if self.fair_scheduling:
+            items_class = PlanItems if self.plan else WorkItems
+            if self._feed is not None:
+                self._scheduler = FairScheduler(items_class(), self.per_session_limit, input_finished=False,
+                                                ticket_order=self.plan)
+            elif isinstance(self.work_items, items_class):
+                self._scheduler = FairScheduler(self.work_items, self.per_session_limit, ticket_order=self.plan)
+            else:
+                self._scheduler = FairScheduler(items_class(self.work_items), self.per_session_limit,
+                                                ticket_order=self.plan)
+        self._completed_requests = 0
+        self._outstanding_requests = 0
+        self._dispatch_finished = False
+        self._all_requests_done = asyncio.Event()
+        self._retry_tasks = set()
+        self._held_rows = {}
+        self._pending_results = []
+        self._reported_requests = 0
+
+        session = await transport.get_session(worker_count)
+        workers = self._workers = [asyncio.create_task(self.request_worker(session, queue))
+                                   for _ in range(worker_count)]
+        flusher = asyncio.create_task(self.flush_results_periodically())
+        feeder = None
+        if self._feed is not None and self._scheduler is not None:
+            feeder = asyncio.create_task(self._schedule_feed())
+        try:
+            async for work_item in self._dispatch_order():
+                if not self.running:
+                    break
+                self._outstanding_requests += 1
+                item = (work_item, 0, 1, None, time.monotonic())
+                if not self._hold_for_ticket(item):
+                    await queue.put(item)
+
+            # Requests waiting out a retry delay are re-queued later, so the workers
+            # can only be stopped once every dispatched request has settled.
+            self._dispatch_finished = True
+            if self._outstanding_requests == 0:
+                self._all_requests_done.set()
+            await self._all_requests_done.wait()
+
+            if not self._aborted:
+                for _ in workers:
+                    await queue.put(None)
+            await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            if self._abort_handle is not None:
+                self._abort_handle.cancel()
+            for worker in workers:
+                worker.cancel()
+            flusher.cancel()
+            if feeder is not None:
+                feeder.cancel()
+            self.flush_results()
+
+    async def _dispatch_order(self):
+        if self._scheduler is not None:
+            while True:
+                item = await self._scheduler.next_item()
+                if item is None:
+                    return
+                yield item
+        elif self._feed is not None:
+            while True:
+                batch = await self._feed.get_batch()
+                if batch is None:
+                    return
+                for item in batch:
+                    yield item
+        else:
+            for item in self.work_items:
+                yield item
+
+    async def _schedule_feed(self):
+        # Batches go into the scheduler as soon as the reader produces them, so
+        # round-robin covers every session seen so far.
+        while True:
+            batch = await self._feed.get_batch()
+            if batch is None:
+                break
+            self._scheduler.add_pairs(batch)
+        self._scheduler.finish_input()
+
+    async def request_worker(self, session, queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            while item is not None:
+                try:
+                    item = await self._process(session, queue, item)
+                except Exception as e:
+                    item = self._fail_request(item, e)
+
+    def _hold_for_ticket(self, item) -> bool:
+        # Plan rows for one ticket run one at a time, in the order they are
+        # dispatched: a row waits while an earlier row for the ticket is in flight or
+        # waiting to retry, and is sent by the worker that settles that row.
+        if not self.plan:
+            return False
+        ticket_id = item[0][1]
+        held = self._held_rows.get(ticket_id)
+        if held is None:
+            self._held_rows[ticket_id] = deque()
+            return False
+        held.append(item)
+        return True
+
+    def _next_held(self, work_item):
+        held = self._held_rows.get(work_item[1]) if self.plan else None
+        if held is None:
+            return None
+        if held:
+            return held.popleft()
+        del self._held_rows[work_item[1]]
+        return None
+
+    def _drop_held(self, work_item):
+        # Cancelled: the rows held behind a dropped row are dropped with it.
+        item = self._next_held(work_item)
+        while item is not None:
+            self._settle_request(item[0])
+            item = self._next_held(item[0])
+
+    async def _process(self, session, queue, item):
+        # Sends one request of a work item. Returns what the same worker sends
+        # straight away: the item's next step when it has one (the add of a move),
+        # or the next plan row held back for the same ticket.
+        work_item, step, attempt, first_sent, enqueued_at = item
+        await self._resumed.wait()
+        if not self.running and (step == 0 or attempt > 1):
+            # The add of a move whose removal just went through is still sent while
+            # cancelling; a dropped one is picked up by a resumed run.
+            self._settle_request(work_item)
+            return self._next_held(work_item)
+
+        if first_sent is None:
+            first_sent = time.monotonic()
+        steps = self._steps(work_item)
+        method, session_id = steps[step]
+        ticket_id = work_item[1]
+        url = self.format_link(session_id, ticket_id)
+        result = await self.send_authorized_request(session, method, url, enqueued_at, step == 0 or attempt > 1)
+        if result is None:
+            # Cancelled while waiting for a concurrency slot or a rate token.
+            self._settle_request(work_item)
+            return self._next_held(work_item)
+        status, response_text, retry_after = result
+
+        delay = self.retry_policy.next_delay(status, attempt, time.monotonic() - first_sent, retry_after)
+        if delay is not None and not self.running:
+            # Cancelled: drop the retry. The request isn't journaled, so a resumed
+            # run picks it up again.
+            self._settle_request(work_item)
+            return self._next_held(work_item)
+        if delay is not None:
+            # Sleep in a separate task so the worker and its concurrency slot are
+            # free to serve other requests in the meantime.
+            retry_task = asyncio.create_task(
+                self._requeue_after(queue, (work_item, step, attempt + 1, first_sent), delay))
+            self._retry_tasks.add(retry_task)
+            retry_task.add_done_callback(self._retry_tasks.discard)
+            return None
+
+        succeeded = 200 <= status < 300
+        self.handle_response(session_id, ticket_id, status, response_text, attempt, method,
+                             self._report_operation(work_item, step, succeeded))
+        if succeeded and step + 1 < len(steps):
+            return work_item, step + 1, 1, None, time.monotonic()
+
+        # A move whose removal failed stops there, so the ticket isn't left in both sessions.
+        self._completed_requests += 1
+        self._settle_request(work_item)
+        return self._next_held(work_item)
+
+    def _fail_request(self, item, error):
+        # An unexpected error while sending: the item is reported as failed with
+        # status 0 and settled, so it can't hold up the run.
+        work_item, step, attempt = item[:3]
+        try:
+            method, session_id = self._steps(work_item)[step]
+            self.handle_response(session_id, work_item[1], 0, f"{type(error).__name__}: {error}", attempt, method,
+                                 self._report_operation(work_item, step, False))
+        finally:
+            self._completed_requests += 1
+            self._settle_request(work_item)
+        return self._next_held(work_item)
+
+    def _steps(self, work_item):
+        if self.plan:
+            return plan_steps(work_item)
+        return (self.request_method, work_item[0]),
+
+    def _report_operation(self, work_item, step, succeeded):
+        # What a failure report row should redo: a move that failed at its removal is
+        # reported as the whole move, and a failed add after a removal as just the add.
+        if succeeded:
+            return None
+        if self.plan and work_item[2] == MOVE and step == 0:
+            return MOVE, work_item[3]
+        return self._steps(work_item)[step][0], None
+
+    async def _requeue_after(self, queue, item, delay):
+        try:
+            await asyncio.sleep(delay)
+            await queue.put(item + (time.monotonic(),))
+        except asyncio.CancelledError:
+            self._settle_request(item[0])
+            self._drop_held(item[0])
+            raise
+
+    def _settle_request(self, work_item):
+        # A work item holds its session's scheduler slot until its last step settles.
+        if self._scheduler is not None:
+            self._scheduler.release(work_item[0])
+        self._outstanding_requests -= 1
+        if self._dispatch_finished and self._outstanding_requests == 0:
+            self._all_requests_done.set()
+
+    async def send_authorized_request(self, session, method, url, enqueued_at, droppable=True):
+        credential = self.credentials.choose()
+        if credential.expires_soon():
+            await credential.refresh(credential.access_token)
+
+        access_token = credential.access_token
+        result = await self.send_request(session, method, url, access_token, enqueued_at, droppable)
+        if result is None:
+            return None
+
+        # Replay once with a fresh token when the current one was rejected mid-run.
+        if result[0] == 401 and credential.token_source is not None:
+            await credential.refresh(access_token)
+            if credential.access_token != access_token:
+                replayed = await self.send_request(session, method, url, credential.access_token, time.monotonic(),
+                                                   droppable)
+                result = replayed or result
+        credential.record(result[0])
+        return result
+
+    async def send_request(self, session, method, url, access_token, enqueued_at, droppable=True):
+        # Returns None when the request was cancelled before it went out.
+        if self._limiter is None:
+            return await self._timed_send(session, method, url, access_token, enqueued_at, droppable)
+
+        await self._limiter.acquire()
+        started = time.monotonic()
+        status = 0
+        try:
+            if not await self._still_wanted(droppable):
+                return None
+            result = await self._timed_send(session, method, url, access_token, enqueued_at, droppable)
+            if result is not None:
+                status = result[0]
+            return result
+        finally:
+            # Status 0 with nothing sent leaves the limit as it was.
+            await self._limiter.release(status, time.monotonic() - started)
+
+    async def _still_wanted(self, droppable):
+        # Pause and cancel also hold back requests that were waiting for a
+        # concurrency slot or a rate token when they were requested.
+        await self._resumed.wait()
+        return self.running or not droppable
+
+    async def _timed_send(self, session, method, url, access_token, enqueued_at, droppable=True):
+        # The rate token is taken last, once the request holds its concurrency slot,
+        # so the request goes out as soon as the token is granted.
+        rate_limit_wait = 0.0
+        if self.rate_limiter is not None:
+            rate_limit_wait = await self.rate_limiter.acquire()
+            if not await self._still_wanted(droppable):
+                self.rate_limiter.refund()
+                return None
+        if self.metrics is None:
+            return await self._send(session, method, url, access_token)
+
+        # Queue wait covers both the dispatch queue and any wait for a limiter slot.
+        started = time.monotonic()
+        timings = {"queue_wait": started - enqueued_at - rate_limit_wait}
+        if self.rate_limiter is not None:
+            timings["rate_limit_wait"] = rate_limit_wait
+        result = await self._send(session, method, url, access_token, timings)
+        timings["total"] = time.monotonic() - started
+        self.metrics.observe(timings, result[0])
+        return result
+
+    async def _send(self, session, method, url, access_token, timings=None):
+        headers = {"Authorization": f"Bearer {access_token}"}
+
+        if method == "PUT":
+            request_func = session.put
+        elif method == "DELETE":
+            request_func = session.delete
+        else:
+            raise ValueError(f"Invalid request_method: {method}")
+
+        try:
+            async with request_func(url, headers=headers, trace_request_ctx=timings) as response:
+                response_text = await self.response_policy.read(response)
+                return response.status, response_text, response.headers.get("Retry-After")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return 0, f"{type(e).__name__}: {e}" if str(e) else type(e).__name__, None
+
+    def handle_response(self, session_id, ticket_id, status, response_text, attempts=1, method=None,
+                        report_operation=None):
+        method = method or self.request_method
+        if self.journal is not None:
+            self.journal.record(method, session_id, ticket_id, status)
+
+        if not 200 <= status < 300:
+            operation, to_session_id = report_operation or (method, None)
+            self.failed_requests.add_failed_request(session_id, ticket_id, status, response_text, attempts,
+                                                    self.response_policy.classify(status, response_text),
+                                                    OPERATION_NAMES.get(operation, ""), to_session_id)
+
+        self._pending_results.append((session_id, ticket_id, status, response_text))
+        if len(self._pending_results) >= self.result_batch_size:
+            self.flush_results()
+
+    async def flush_results_periodically(self):
+        last_live_update = last_export = time.monotonic()
+        while True:
+            await asyncio.sleep(self.result_flush_interval)
+            self.flush_results()
+
+            # Keep the tokens fresh while paused so resuming doesn't start with a refresh.
+            if self.paused:
+                for credential in self.credentials.credentials:
+                    if credential.expires_soon():
+                        await credential.refresh(credential.access_token)
+
+            if self.metrics is None:
+                continue
+            now = time.monotonic()
+            if now - last_live_update >= 1.0:
+                last_live_update = now
+                self.on_metrics(*self.metrics.live())
+            if self.metrics_path is not None and now - last_export >= self.metrics_interval:
+                last_export = now
+                self.export_metrics()
+
+    def export_metrics(self):
+        if len(self.credentials) > 1:
+            self.metrics.credentials = self.credentials.stats()
+        self.metrics.export(self.metrics_path)
+
+    def flush_results(self):
+        # Results and progress are reported in bounded batches, so the number of
+        # GUI signals or console writes doesn't grow with the request rate.
+        if self._pending_results:
+            self.on_results(self._pending_results)
+            self._pending_results = []
+        if self._completed_requests != self._reported_requests:
+            self._reported_requests = self._completed_requests
+            self.on_progress(self._completed_requests)
+
+    def cancel(self, deadline: float = None):
+        # Safe to call from any thread and never blocks. New dispatches and retries
+        # stop at once; requests already in flight get until the deadline to finish
+        # and are aborted after that.
+        self.running = False
+        if self._feed is not None:
+            self._feed.close()
+        self._call_in_loop(self._cancel_in_loop, self.cancel_deadline if deadline is None else deadline)
+
+    def pause(self):
+        # In-flight requests finish, nothing new is sent; the session, its pooled
+        # connections and the token stay alive for resume().
+        self.paused = True
+        self._call_in_loop(self._apply_pause)
+
+    def resume(self):
+        self.paused = False
+        self._call_in_loop(self._apply_pause)
+
+    def _call_in_loop(self, callback, *args):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(callback, *args)
+
+    def _apply_pause(self):
+        if self.paused and self.running:
+            self._resumed.clear()
+        else:
+            self._resumed.set()
+
+    def _cancel_in_loop(self, deadline: float):
+        if self._all_requests_done is None or self._all_requests_done.is_set():
+            return
+
+        self._apply_pause()
+        if self._scheduler is not None:
+            self._scheduler.close()
+        for retry_task in list(self._retry_tasks):
+            retry_task.cancel()
+        self._drain_queue()
+        if self._abort_handle is None:
+            self._abort_handle = self._loop.call_later(deadline, self._abort)
+
+    def _abort(self):
+        self._aborted = True
+        for worker in self._workers:
+            worker.cancel()
+        if self._scheduler is not None:
+            # Aborted requests never settle, so a dispatcher waiting on a capped
+            # session would otherwise never wake up.
+            self._scheduler.close()
+        self._drain_queue()
+        self._all_requests_done.set()
+
+    def _drain_queue(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if item is not None:
+                self._settle_request(item[0])
+                self._drop_held(item[0])
+
@@ -0,0 +1,72 @@
+import json
+import re
+
+from failed_request_handler import error_class_for
+
+SUCCESS_BODY_MODES = ("drain", "discard", "full")
+
+ERROR_CODE_KEYS = ("errorCode", "error_code", "code", "error", "type")
+
+# Fallback for error bodies cut off at max_error_bytes, which no longer parse as JSON.
+ERROR_CODE_PATTERNS = [re.compile(rf'"{key}"\s*:\s*"?([A-Za-z0-9_.-]{{1,64}})') for key in ERROR_CODE_KEYS]
+
+
+class ResponsePolicy:
+    # How much of each response body is read. Successful bodies are normally only
+    # drained, without decoding, so the connection can go back to the pool
+    # ("discard" skips even that, and the connection is closed instead). Error
+    # bodies are kept up to max_error_bytes. "full" decodes every body and is meant
+    # for debugging only.
+    def __init__(self, success_body: str = "drain", max_error_bytes: int = 2048, parse_error_codes: bool = True):
+        if success_body not in SUCCESS_BODY_MODES:
+            raise ValueError(f"Invalid success_body: {success_body}")
+        self.success_body = success_body
+        self.max_error_bytes = max_error_bytes
+        self.parse_error_codes = parse_error_codes
+
+    async def read(self, response) -> str:
+        if 200 <= response.status < 300:
+            if self.success_body == "full":
+                return await response.text()
+            if self.success_body == "drain":
+                await self._drain(response)
+            return ""
+
+        if self.success_body == "full":
+            return await response.text()
+        # read(n) returns whatever has arrived, up to n bytes, so a body that comes in
+        # several chunks is read until the limit or its end.
+        body = bytearray()
+        while len(body) < self.max_error_bytes:
+            chunk = await response.content.read(self.max_error_bytes - len(body))
+            if not chunk:
+                break
+            body += chunk
+        await self._drain(response)
+        return body.decode(response.charset or "utf-8", errors="replace")
+
+    @staticmethod
+    async def _drain(response):
+        while await response.content.readany():
+            pass
+
+    def classify(self, status: int, body: str) -> str:
+        # e.g. "conflict:ALREADY_REGISTERED" when the error body names a code.
+        error_class = error_class_for(status, body)
+        if status == 0 or not self.parse_error_codes or not body.lstrip().startswith("{"):
+            return error_class
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            for pattern in ERROR_CODE_PATTERNS:
+                match = pattern.search(body)
+                if match:
+                    return f"{error_class}:{match.group(1)}"
+            return error_class
+        if not isinstance(payload, dict):
+            return error_class
+        for key in ERROR_CODE_KEYS:
+            code = payload.get(key)
+            if isinstance(code, (str, int)) and not isinstance(code, bool) and 0 < len(str(code)) <= 64:
+                return f"{error_class}:{code}"
+        return error_class
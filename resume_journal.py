@@ -0,0 +1,101 @@
+import hashlib
+import os
+import sys
+import time
+from typing import Set, Tuple
+
+CompletedKey = Tuple[int, str]
+
+
+class ResumeJournal:
+    def __init__(self, path: str, append: bool = True, flush_interval: float = 1.0, batch_size: int = 1000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+        self._pending = []
+        if append and self._file.tell() > 0 and not self._ends_with_newline(path):
+            # Terminate a line torn by a crash so the next record starts cleanly.
+            self._pending.append("\n")
+        self._last_flush = time.monotonic()
+
+    def record(self, method: str, session_id, ticket_id, status: int):
+        self._pending.append(f"{method}\t{session_id}\t{ticket_id}\t{status}\n")
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        # Records are synced in batches: a crash loses at most one flush interval,
+        # and those requests are simply sent again on resume.
+        if self._pending:
+            self._file.write("".join(self._pending))
+            self._pending = []
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def discard(self):
+        # A run that completed everything leaves nothing to resume.
+        self._pending = []
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        with open(path, "rb") as journal_file:
+            journal_file.seek(-1, os.SEEK_END)
+            return journal_file.read(1) == b"\n"
+
+    @staticmethod
+    def path_for(input_file: str, event_id: str, method: str, key: str = None) -> str:
+        # Journals live in the user's app data, keyed by the input's full path, so an
+        # input on a read-only share can still be resumed. key tells apart jobs that
+        # share all three, e.g. repeated manifest entries.
+        digest = hashlib.sha1(os.path.abspath(input_file).encode("utf-8")).hexdigest()[:12]
+        name = f"{os.path.basename(input_file)}.{digest}.{event_id}.{method.lower()}"
+        name += f".{key}.journal" if key is not None else ".journal"
+        return os.path.join(journal_dir(), name)
+
+    @staticmethod
+    def load_completed(path: str, method: str) -> Set[CompletedKey]:
+        completed = set()
+        if not os.path.exists(path):
+            return completed
+
+        with open(path, encoding="utf-8") as journal_file:
+            for line in journal_file:
+                fields = line.rstrip("\n").split("\t")
+                # A torn last line from a crash has fewer fields and is skipped.
+                if len(fields) != 4 or fields[0] != method:
+                    continue
+                try:
+                    session_id, status = int(fields[1]), int(fields[3])
+                except ValueError:
+                    continue
+                if 200 <= status < 300:
+                    completed.add((session_id, fields[2]))
+        return completed
+
+
+def journal_dir() -> str:
+    path = os.environ.get("SESSIONREG_JOURNAL_DIR")
+    if not path:
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+            path = os.path.join(base, "SessionRegMaster", "journals")
+        elif sys.platform == "darwin":
+            path = os.path.expanduser("~/Library/Application Support/SessionRegMaster/journals")
+        else:
+            base = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+            path = os.path.join(base, "sessionregmaster", "journals")
+    os.makedirs(path, exist_ok=True)
+    return path
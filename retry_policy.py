@@ -0,0 +1,51 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Union
+
+# Status 0 stands for connection-level failures (resets, DNS errors, timeouts).
+DEFAULT_MAX_ATTEMPTS = {
+    0: 4,
+    429: 6,
+    "5xx": 4,
+}
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: Optional[Dict[Union[int, str], int]] = None, base_delay: float = 0.5,
+                 max_delay: float = 30.0, max_total_delay: float = 120.0):
+        self.max_attempts = DEFAULT_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_total_delay = max_total_delay
+
+    def attempts_for(self, status: int) -> int:
+        if status in self.max_attempts:
+            return self.max_attempts[status]
+        return self.max_attempts.get(f"{status // 100}xx", 1)
+
+    def next_delay(self, status: int, attempt: int, elapsed: float, retry_after: Optional[str] = None) -> Optional[float]:
+        if attempt >= self.attempts_for(status):
+            return None
+
+        delay = self.parse_retry_after(retry_after)
+        if delay is None:
+            # Exponential backoff with full jitter.
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+        if elapsed + delay > self.max_total_delay:
+            return None
+        return delay
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
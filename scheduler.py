@@ -0,0 +1,143 @@
+import asyncio
+from array import array
+from collections import Counter, deque
+from typing import Iterable, Optional
+
+from data_processor import WorkItems
+
+
+class FairScheduler:
+    # Hands out work items round-robin across sessions instead of in input order, so
+    # a large session doesn't get every concurrent request while the rest wait. With
+    # per_session_limit, a session that already has that many requests dispatched
+    # (queued, in flight or waiting to retry) is skipped until one of them settles.
+    # Items can keep arriving through add_pairs() until finish_input() is called.
+    # With ticket_order (plan jobs), an item is never handed out before an earlier
+    # item for the same ticket: a session whose next item is out of turn waits until
+    # the earlier one has been handed out by its own session.
+    def __init__(self, work_items: WorkItems, per_session_limit: int = None, input_finished: bool = True,
+                 ticket_order: bool = False):
+        self.work_items = work_items
+        self.per_session_limit = per_session_limit
+
+        # Per-session lists of indices into work_items: 4 bytes per item on top of
+        # the packed pairs.
+        self._pending = {}
+        self._cursors = {}
+        self._ready = deque()
+        self._blocked = set()
+        self._dispatched = Counter()
+        # Each item's place among the items for its ticket, and per ticket how many
+        # items were added and handed out. Tickets whose items have all been handed
+        # out are dropped, so this only covers tickets with items still to send.
+        self._ordinals = array("I") if ticket_order else None
+        self._added = Counter()
+        self._taken = Counter()
+        self._parked = {}
+        self._wakeup = asyncio.Event()
+        self._input_finished = False
+        self._closed = False
+        for index, session_id in enumerate(work_items.session_ids):
+            self._add_index(session_id, index)
+        if input_finished:
+            self.finish_input()
+
+    def __len__(self):
+        return len(self.work_items)
+
+    def add_pairs(self, pairs: Iterable[tuple]):
+        # Items start with (session_id, ticket_id); plan items carry their operation too.
+        for item in pairs:
+            self.work_items.append(*item)
+            self._add_index(item[0], len(self.work_items) - 1)
+        self._wakeup.set()
+
+    def finish_input(self):
+        self._input_finished = True
+        for session_id in [session_id for session_id, indices in self._pending.items()
+                           if self._cursors[session_id] == len(indices)]:
+            del self._pending[session_id], self._cursors[session_id]
+        self._wakeup.set()
+
+    def _add_index(self, session_id: int, index: int):
+        if self._ordinals is not None:
+            ticket_id = self.work_items[index][1]
+            self._ordinals.append(self._added[ticket_id])
+            self._added[ticket_id] += 1
+        indices = self._pending.get(session_id)
+        if indices is None:
+            indices = self._pending[session_id] = array("I")
+            self._cursors[session_id] = 0
+        if self._cursors[session_id] == len(indices) and session_id not in self._blocked:
+            # The session had nothing left to send; it rejoins the rotation, or waits
+            # for a slot if it's at its limit.
+            if self._at_limit(session_id):
+                self._blocked.add(session_id)
+            else:
+                self._ready.append(session_id)
+        indices.append(index)
+
+    def _at_limit(self, session_id: int) -> bool:
+        return self.per_session_limit is not None and self._dispatched[session_id] >= self.per_session_limit
+
+    async def next_item(self) -> Optional[tuple]:
+        while not self._closed:
+            while self._ready:
+                item = self._take(self._ready.popleft())
+                if item is not None:
+                    return item
+            if not self._blocked and not self._parked and self._input_finished:
+                return None
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        return None
+
+    def _take(self, session_id: int) -> Optional[tuple]:
+        indices = self._pending[session_id]
+        cursor = self._cursors[session_id]
+        item = self.work_items[indices[cursor]]
+        if self._ordinals is not None and not self._in_turn(session_id, indices[cursor], item[1]):
+            return None
+        self._dispatched[session_id] += 1
+
+        if cursor + 1 == len(indices):
+            if self._input_finished:
+                del self._pending[session_id], self._cursors[session_id]
+            else:
+                # More items for this session may still arrive; start a fresh list.
+                self._pending[session_id] = array("I")
+                self._cursors[session_id] = 0
+        else:
+            self._cursors[session_id] = cursor + 1
+            if self._at_limit(session_id):
+                self._blocked.add(session_id)
+            else:
+                self._ready.append(session_id)
+        return item
+
+    def _in_turn(self, session_id: int, index: int, ticket_id) -> bool:
+        if self._ordinals[index] != self._taken[ticket_id]:
+            # Parked until the ticket's earlier item is handed out. That item is
+            # earlier in the input than this session's next one, so it is never
+            # stuck behind it.
+            self._parked.setdefault(ticket_id, []).append(session_id)
+            return False
+        taken = self._taken[ticket_id] + 1
+        if taken == self._added[ticket_id]:
+            del self._taken[ticket_id], self._added[ticket_id]
+        else:
+            self._taken[ticket_id] = taken
+        self._ready.extend(self._parked.pop(ticket_id, ()))
+        return True
+
+    def release(self, session_id: int):
+        self._dispatched[session_id] -= 1
+        if session_id in self._blocked:
+            self._blocked.discard(session_id)
+            if session_id in self._pending and self._cursors[session_id] < len(self._pending[session_id]):
+                self._ready.append(session_id)
+                self._wakeup.set()
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
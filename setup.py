@@ -4,7 +4,8 @@ APP = ['main.py']
 DATA_FILES = []
 OPTIONS = {
     'argv_emulation': True,
-    'packages': ['PyQt6', 'aiohttp', 'openpyxl', 'requests', 'platformdirs', 'chardet', 'charset_normalizer'],
+    # Nothing imports platformdirs or chardet (requests and aiohttp use charset_normalizer).
+    'packages': ['PyQt6', 'aiohttp', 'openpyxl', 'requests', 'charset_normalizer'],
     'iconfile': 'icon.icns',
 }
 
@@ -0,0 +1,146 @@
+import json
+import sys
+import time
+from importlib.abc import MetaPathFinder
+from typing import Dict, List, Optional
+
+
+class _TimedLoader:
+    # Stands in for a module's loader while it executes; everything else is passed
+    # through to the real loader, which is put back once the module has loaded.
+    def __init__(self, loader, timer: 'ImportTimer', name: str):
+        self._loader = loader
+        self._timer = timer
+        self._name = name
+
+    def __getattr__(self, attribute):
+        return getattr(self._loader, attribute)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        timer = self._timer
+        timer._children.append(0.0)
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            cumulative = time.perf_counter() - started
+            children = timer._children.pop()
+            if timer._children:
+                timer._children[-1] += cumulative
+            timer.timings[self._name] = (cumulative - children, cumulative, len(timer._children))
+            module.__loader__ = self._loader
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self._loader
+
+
+class ImportTimer(MetaPathFinder):
+    # Times every module imported while installed, the way python -X importtime
+    # does: cumulative time includes the module's own imports, self time doesn't.
+    # Only meant for the startup-timings mode, since it wraps every loader.
+    def __init__(self):
+        self.timings: Dict[str, tuple] = {}
+        self._children: List[float] = []
+
+    def install(self) -> 'ImportTimer':
+        sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self, fullname)
+        return spec
+
+    def top_level(self, count: int = 15) -> List[tuple]:
+        # (module, self seconds, cumulative seconds) of the imports made directly by
+        # the app, slowest first.
+        entries = [(name, own, cumulative) for name, (own, cumulative, depth) in self.timings.items() if depth == 0]
+        return sorted(entries, key=lambda entry: entry[2], reverse=True)[:count]
+
+    def slowest(self, count: int = 15) -> List[tuple]:
+        entries = [(name, own, cumulative) for name, (own, cumulative, depth) in self.timings.items()]
+        return sorted(entries, key=lambda entry: entry[1], reverse=True)[:count]
+
+
+class StartupProfile:
+    # Time from process start to each startup phase, with the import time per
+    # module, checked against a budget for the imports and for the first paint.
+    def __init__(self, started: float, import_budget: float, first_paint_budget: float,
+                 report_path: Optional[str] = None):
+        self.started = started
+        self.budgets = {"imports": import_budget, "first_paint": first_paint_budget}
+        self.report_path = report_path
+        self.marks: Dict[str, float] = {}
+        self.timer = ImportTimer().install()
+
+    def mark(self, phase: str):
+        self.marks[phase] = time.perf_counter() - self.started
+
+    def over_budget(self) -> List[str]:
+        return [phase for phase, budget in self.budgets.items() if self.marks.get(phase, 0.0) > budget]
+
+    def watch_first_paint(self, app, window):
+        # The report is made at the window's first paint. With a report path the app
+        # then quits, with exit status 1 when a budget was exceeded, so launches can
+        # be tracked from a script.
+        from PyQt6.QtCore import QEvent, QObject, QTimer
+
+        profile = self
+
+        class FirstPaintFilter(QObject):
+            def eventFilter(self, watched, event):
+                if event.type() == QEvent.Type.Paint and "first_paint" not in profile.marks:
+                    profile.mark("first_paint")
+                    watched.removeEventFilter(self)
+                    profile.finish()
+                    if profile.report_path:
+                        QTimer.singleShot(0, lambda: app.exit(1 if profile.over_budget() else 0))
+                return False
+
+        self._filter = FirstPaintFilter(window)
+        window.installEventFilter(self._filter)
+
+    def finish(self):
+        self.timer.uninstall()
+        for line in self.report_lines():
+            print(line, file=sys.stderr)
+        if self.report_path:
+            with open(self.report_path, "w", encoding="utf-8") as report_file:
+                json.dump(self.snapshot(), report_file, indent=2)
+
+    def snapshot(self) -> dict:
+        return {
+            "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in self.marks.items()},
+            "budgets_ms": {phase: round(seconds * 1000, 1) for phase, seconds in self.budgets.items()},
+            "over_budget": self.over_budget(),
+            "modules": {name: {"self_ms": round(own * 1000, 2), "cumulative_ms": round(cumulative * 1000, 2)}
+                        for name, (own, cumulative, _) in sorted(self.timer.timings.items())},
+        }
+
+    def report_lines(self) -> List[str]:
+        lines = ["Startup phases (ms since start):"]
+        for phase, seconds in self.marks.items():
+            budget = self.budgets.get(phase)
+            note = "" if budget is None else f"  (budget {budget * 1000:.0f}{', OVER' if seconds > budget else ''})"
+            lines.append(f"  {phase:<12} {seconds * 1000:8.1f}{note}")
+        lines.append("Slowest imports made by the app (cumulative / self ms):")
+        for name, own, cumulative in self.timer.top_level():
+            lines.append(f"  {cumulative * 1000:8.1f} {own * 1000:8.1f}  {name}")
+        lines.append("Slowest modules by self time (ms):")
+        for name, own, _ in self.timer.slowest():
+            lines.append(f"  {own * 1000:8.1f}  {name}")
+        return lines
@@ -0,0 +1,24 @@
+import pytest
+
+import cli
+
+
+def test_empty_clients_file_is_a_usage_error(tmp_path, capsys, monkeypatch):
+    monkeypatch.delenv("BIZZABO_CLIENT_ID", raising=False)
+    clients_file = tmp_path / "clients.json"
+    clients_file.write_text("[]")
+
+    with pytest.raises(SystemExit) as exit_info:
+        cli.parse_args(["add", "--file", "in.csv", "--event", "1", "--account-id", "account",
+                        "--clients-file", str(clients_file)])
+
+    assert exit_info.value.code == 2
+    assert "no API clients" in capsys.readouterr().err
+
+
+def test_auth_url_is_passed_to_jobs():
+    args = cli.parse_args(["add", "--file", "in.csv", "--event", "1", "--client-id", "id", "--client-secret", "secret",
+                           "--account-id", "account", "--auth-url", "http://127.0.0.1:8080/oauth/token"])
+
+    assert args.clients == [("id", "secret")]
+    assert cli.job_options(args)["auth_url"] == "http://127.0.0.1:8080/oauth/token"
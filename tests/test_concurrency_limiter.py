@@ -0,0 +1,82 @@
+import asyncio
+import types
+
+import concurrency_limiter
+from concurrency_limiter import AdaptiveConcurrencyLimiter
+
+
+def send(limiter, *responses):
+    async def run():
+        for status, latency in responses:
+            await limiter.acquire()
+            await limiter.release(status, latency)
+
+    asyncio.run(run())
+
+
+def test_limit_grows_by_about_one_per_window_of_successes():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=10)
+
+    send(limiter, *[(200, 0.1)] * 4)
+
+    assert limiter.limit == 4
+    send(limiter, (200, 0.1))
+    assert limiter.limit == 5
+
+
+def test_limit_is_halved_on_429_and_503():
+    changes = []
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=40, on_limit_change=changes.append)
+
+    send(limiter, (429, 0.1))
+    send(limiter, (503, 0.1))
+
+    assert changes == [20, 10]
+
+
+def test_limit_stays_within_floor_and_ceiling():
+    low = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=2)
+    high = AdaptiveConcurrencyLimiter(initial_limit=3, max_limit=3)
+
+    send(low, *[(429, 0.1)] * 3)
+    send(high, *[(200, 0.1)] * 10)
+
+    assert (low.limit, high.limit) == (2, 3)
+    assert AdaptiveConcurrencyLimiter(initial_limit=500, max_limit=100).limit == 100
+
+
+def test_other_errors_leave_the_limit_alone():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+
+    send(limiter, (404, 0.1), (500, 0.1))
+
+    assert limiter.limit == 8
+
+
+def test_backs_off_once_per_round_trip(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(concurrency_limiter, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=40)
+    send(limiter, (200, 1.0))
+
+    # Requests already in flight when the server started throttling.
+    send(limiter, (429, 1.0), (429, 1.0), (429, 1.0))
+    assert limiter.limit == 20
+
+    now[0] += 1.5
+    send(limiter, (429, 1.0))
+    assert limiter.limit == 10
+
+
+def test_acquire_waits_for_a_free_slot():
+    async def run():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        await limiter.release(404, 0.1)
+        await asyncio.wait_for(waiting, 1)
+        return limiter.in_flight
+
+    assert asyncio.run(run()) == 1
@@ -0,0 +1,67 @@
+import asyncio
+from collections import Counter
+
+from credential_pool import Credential, CredentialPool
+
+
+class CountingTokenSource:
+    client_id = "client"
+
+    def __init__(self, tokens):
+        self.tokens = list(tokens)
+        self.refreshes = 0
+
+    def refresh(self, stale_token):
+        self.refreshes += 1
+        token = self.tokens.pop(0)
+        if isinstance(token, Exception):
+            raise token
+        return token
+
+    def expires_soon(self):
+        return False
+
+
+def test_concurrent_refreshes_share_one_fetch():
+    source = CountingTokenSource(["fresh"])
+    credential = Credential(source, "stale")
+
+    async def refresh_together():
+        await asyncio.gather(*(credential.refresh("stale") for _ in range(10)))
+
+    asyncio.run(refresh_together())
+
+    assert credential.access_token == "fresh"
+    assert source.refreshes == 1
+
+
+def test_failed_refresh_backs_off_before_the_next_attempt():
+    source = CountingTokenSource([ConnectionError("down"), ""])
+    credential = Credential(source, "stale")
+
+    async def refresh_three_times():
+        for _ in range(3):
+            await credential.refresh("stale")
+
+    asyncio.run(refresh_three_times())
+
+    assert credential.access_token == "stale"
+    assert source.refreshes == 1
+
+    credential._next_refresh = 0.0
+    asyncio.run(credential.refresh("stale"))
+    assert source.refreshes == 2
+    assert credential._refresh_failures == 2
+
+
+def test_throttled_client_gets_a_smaller_share():
+    calm, throttled = Credential(access_token="a", name="calm"), Credential(access_token="b", name="throttled")
+    pool = CredentialPool([calm, throttled])
+    for _ in range(100):
+        throttled.record(429)
+        calm.record(200)
+
+    chosen = Counter(pool.choose().name for _ in range(1000))
+
+    assert chosen["throttled"] < 100
+    assert chosen["calm"] + chosen["throttled"] == 1000
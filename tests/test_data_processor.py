@@ -0,0 +1,34 @@
+from data_processor import DataProcessor, WorkItems
+
+
+def test_integer_ticket_ids_are_packed():
+    items = WorkItems([(20, 1), (21, 2 ** 63 - 1)])
+
+    assert list(items) == [(20, 1), (21, 2 ** 63 - 1)]
+    assert items.text_ticket_ids == {}
+    assert len(items) == 2
+
+
+def test_text_and_out_of_range_ticket_ids_go_to_the_side_table():
+    pairs = [(20, "0012"), (21, 5), (22, -3), (23, 2 ** 64), (24, "ABC-7")]
+    items = WorkItems(pairs)
+
+    assert list(items) == pairs
+    assert [items[index] for index in range(len(items))] == pairs
+    assert items.text_ticket_ids == {0: "0012", 2: -3, 3: 2 ** 64, 4: "ABC-7"}
+    assert list(items.ticket_ids) == [-1, 5, -1, -1, -1]
+
+
+def test_completed_pairs_are_skipped_by_their_text_form():
+    processor = DataProcessor("event")
+
+    items = processor.build_work_items([(20, "0012"), (20, 12), (21, 7)], completed={(20, "0012"), (21, "7")})
+
+    assert list(items) == [(20, 12)]
+
+
+def test_links_use_the_configured_base_url():
+    processor = DataProcessor("event", api_base_url="http://127.0.0.1:8080")
+
+    assert processor.format_link(20, "0012") == (
+        "http://127.0.0.1:8080/v1/events/event/agenda/sessions/20/registrations/0012")
@@ -0,0 +1,32 @@
+import pytest
+
+from failed_request_handler import FailedRequests
+from input_readers import iter_input_pairs
+from job_plan import iter_plan_items
+
+
+def test_iter_rows_keeps_ticket_ids_with_leading_zeros_as_text():
+    failed = FailedRequests()
+    failed.add_failed_request(20, "0012", 404, "not found")
+    failed.add_failed_request(20, 12, 404, "not found")
+    try:
+        assert [row[:2] for row in failed.iter_rows()] == [(20, "0012"), (20, 12)]
+    finally:
+        failed.discard()
+
+
+@pytest.mark.parametrize("extension", [".csv", ".jsonl", ".xlsx"])
+def test_report_reads_back_as_input_and_plan(tmp_path, extension):
+    if extension == ".xlsx":
+        pytest.importorskip("openpyxl")
+    failed = FailedRequests()
+    failed.add_failed_request(20, "0012", 404, "not found", 1, None, "add")
+    failed.add_failed_request(20, 7, 500, "boom", 4, None, "move", 21)
+    path = str(tmp_path / f"failed{extension}")
+    try:
+        failed.save_to_file(path)
+    finally:
+        failed.discard()
+
+    assert list(iter_input_pairs(path)) == [(20, "0012"), (20, 7)]
+    assert list(iter_plan_items(path)) == [(20, "0012", "PUT", None), (20, 7, "MOVE", 21)]
@@ -0,0 +1,86 @@
+import pytest
+
+from input_readers import format_ticket_id, iter_input_pairs, parse_ticket_id
+from job_plan import iter_plan_items
+
+
+@pytest.mark.parametrize("text, ticket_id", [
+    ("1000000", 1000000),
+    (" 42 ", 42),
+    ("0", 0),
+    ("0012", "0012"),
+    ("1000000.0", 1000000),
+    ("1000000.00", 1000000),
+    ("12.5", "12.5"),
+    ("AB-12", "AB-12"),
+])
+def test_parse_ticket_id(text, ticket_id):
+    assert parse_ticket_id(text) == ticket_id
+
+
+def test_format_ticket_id_keeps_whole_floats_as_ints():
+    assert format_ticket_id(1000000.0, "General") == 1000000
+    assert format_ticket_id(1000000.0) == 1000000
+    assert format_ticket_id(12.5) == "12.5"
+
+
+def test_float_ticket_ids_read_the_same_from_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "input.csv"
+    csv_path.write_text("session_id,ticket_id\n20,1000000.0\n20,0012\n", encoding="utf-8")
+    jsonl_path = tmp_path / "input.jsonl"
+    jsonl_path.write_text('{"session_id": 20, "ticket_id": 1000000.0}\n{"session_id": 20, "ticket_id": "0012"}\n',
+                          encoding="utf-8")
+
+    assert list(iter_input_pairs(str(csv_path))) == [(20, 1000000), (20, "0012")]
+    assert list(iter_input_pairs(str(jsonl_path))) == [(20, 1000000), (20, "0012")]
+
+
+def test_float_ticket_ids_read_the_same_in_plans(tmp_path):
+    csv_path = tmp_path / "plan.csv"
+    csv_path.write_text("operation,session_id,ticket_id\nadd,20,1000000.0\n", encoding="utf-8")
+    jsonl_path = tmp_path / "plan.jsonl"
+    jsonl_path.write_text('{"operation": "add", "session_id": 20, "ticket_id": 1000000.0}\n', encoding="utf-8")
+
+    assert list(iter_plan_items(str(csv_path))) == list(iter_plan_items(str(jsonl_path))) == [
+        (20, 1000000, "PUT", None)]
+
+
+ROWS = [(20, 1000000), (20, "0012"), (21, "AB-12"), (21, 7)]
+
+
+def write_inputs(tmp_path):
+    paths = {}
+    paths["csv"] = tmp_path / "input.csv"
+    paths["csv"].write_text("session_id,ticket_id\n" + "".join(f"{s},{t}\n" for s, t in ROWS), encoding="utf-8")
+    paths["tsv"] = tmp_path / "input.tsv"
+    paths["tsv"].write_text("session_id\tticket_id\n" + "".join(f"{s}\t{t}\n" for s, t in ROWS), encoding="utf-8")
+    paths["wide"] = tmp_path / "wide.csv"
+    paths["wide"].write_text("20,21\n1000000,AB-12\n0012,7\n", encoding="utf-8")
+    paths["jsonl"] = tmp_path / "input.jsonl"
+    paths["jsonl"].write_text('{"session_id": 20, "ticket_id": 1000000}\n{"sessionId": 20, "ticketId": "0012"}\n'
+                              '[21, "AB-12"]\n\n{"session_id": 21, "ticket_id": 7}\n', encoding="utf-8")
+    return paths
+
+
+def test_delimited_and_jsonl_readers_agree(tmp_path):
+    paths = write_inputs(tmp_path)
+
+    assert list(iter_input_pairs(str(paths["csv"]))) == ROWS
+    assert list(iter_input_pairs(str(paths["tsv"]))) == ROWS
+    assert list(iter_input_pairs(str(paths["jsonl"]))) == ROWS
+    assert sorted(iter_input_pairs(str(paths["wide"])), key=str) == sorted(ROWS, key=str)
+
+
+def test_excel_reader_agrees_with_the_others(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["session_id", "ticket_id"])
+    sheet.append([20, 1000000.0])
+    sheet.append([20, "0012"])
+    sheet.append([21, "AB-12"])
+    sheet.append([21, 7])
+    path = str(tmp_path / "input.xlsx")
+    workbook.save(path)
+
+    assert list(iter_input_pairs(path)) == ROWS
@@ -0,0 +1,114 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import tempfile
+
+import pytest
+
+import job_manifest
+from failed_request_handler import FailedRequests
+from input_readers import iter_input_pairs
+from job_manifest import JobResult, JobSpec, JobStream, ManifestRunner, run_job, write_report
+from job_plan import iter_plan_items
+
+
+def job_result(tmp_path, name, rows):
+    report = str(tmp_path / f"{name}.csv")
+    failed = FailedRequests(report)
+    for row in rows:
+        failed.add_failed_request(*row)
+    failed.close()
+    return JobResult(JobSpec("event", f"{name}.xlsx", "plan"), len(rows), len(rows), len(rows), [],
+                     failure_report=report)
+
+
+@pytest.mark.parametrize("extension", [".csv", ".jsonl"])
+def test_combined_report_reads_back_as_input_and_plan(tmp_path, extension):
+    results = [
+        job_result(tmp_path, "first", [(20, "0012", 404, "not found", 1, None, "add")]),
+        job_result(tmp_path, "second", [(21, 7, 500, "boom", 3, None, "move", 22)]),
+    ]
+    path = str(tmp_path / f"failed{extension}")
+
+    write_report(results, path)
+
+    assert list(iter_input_pairs(path)) == [(20, "0012"), (21, 7)]
+    assert list(iter_plan_items(path)) == [(20, "0012", "PUT", None), (21, 7, "MOVE", 22)]
+    assert not any(tmp_path.joinpath(f"{name}.csv").exists() for name in ("first", "second"))
+
+
+def test_job_runs_without_a_journal_when_it_cannot_be_written(tmp_path, monkeypatch):
+    blocked = tmp_path / "not-a-directory"
+    blocked.write_text("", encoding="utf-8")
+    monkeypatch.setenv("SESSIONREG_JOURNAL_DIR", str(blocked / "journals"))
+    input_path = tmp_path / "input.csv"
+    input_path.write_text("session_id,ticket_id\n20,1\n", encoding="utf-8")
+
+    stream = JobStream(JobSpec("event", str(input_path), "PUT"), None, {"resume": True}).start()
+
+    assert stream.journal is None
+    assert stream.messages and "can't be resumed" in stream.messages[0]
+    assert asyncio.run(stream.feed.get_batch()) == [(20, 1)]
+
+
+def test_repeated_manifest_entries_keep_separate_journals(tmp_path, monkeypatch):
+    monkeypatch.setenv("SESSIONREG_JOURNAL_DIR", str(tmp_path / "journals"))
+    input_path = tmp_path / "input.csv"
+    input_path.write_text("session_id,ticket_id\n20,1\n", encoding="utf-8")
+    job = JobSpec("event", str(input_path), "PUT")
+
+    streams = [JobStream(job, None, {}, journal_key=f"job{index}") for index in range(2)]
+    for stream in streams:
+        stream.journal.close()
+
+    assert streams[0].journal_path != streams[1].journal_path
+
+
+def test_failure_report_is_removed_when_the_engine_raises(tmp_path, monkeypatch):
+    request_engine = pytest.importorskip("request_engine")
+
+    class BrokenEngine:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def run(self):
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(request_engine, "RequestEngine", BrokenEngine)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path / "reports"))
+    monkeypatch.setattr(job_manifest, "_progress_queue", queue.Queue())
+    monkeypatch.setenv("SESSIONREG_JOURNAL_DIR", str(tmp_path / "journals"))
+    os.mkdir(tmp_path / "reports")
+    input_path = tmp_path / "input.csv"
+    input_path.write_text("session_id,ticket_id\n20,1\n", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        run_job(0, JobSpec("event", str(input_path), "PUT"), ([("id", "secret")], "account"), {})
+
+    assert os.listdir(tmp_path / "reports") == []
+
+
+def fake_run_job(index, job, credentials, options):
+    if job.event_id == "broken":
+        raise ValueError("bad input")
+    job_manifest._progress_queue.put((index, None, 10))
+    job_manifest._progress_queue.put((index, 10, None))
+    return JobResult(job, 10, 10, 0, [f"job {index}"])
+
+
+# The patched run_job only reaches the workers when they are forked.
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="needs forked workers")
+def test_manifest_runner_collects_results_in_job_order(monkeypatch):
+    monkeypatch.setattr(job_manifest, "run_job", fake_run_job)
+    jobs = [JobSpec("first", "a.csv", "PUT"), JobSpec("broken", "b.csv", "PUT"), JobSpec("third", "c.csv", "DELETE")]
+    progress, finished = [], []
+
+    results = ManifestRunner(([("id", "secret")], "account"), max_workers=2, on_progress=lambda *p: progress.append(p),
+                             on_job_finished=finished.append).run(jobs)
+
+    assert [result.job for result in results] == jobs
+    assert [result.messages for result in results] == [["job 0"], [], ["job 2"]]
+    assert results[1].error == "ValueError: bad input" and results[1].total == 0
+    assert sorted(finished, key=lambda result: jobs.index(result.job)) == results
+    assert progress[-1] == (20, 20)
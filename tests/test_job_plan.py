@@ -0,0 +1,24 @@
+from job_plan import MOVE, plan_steps, skip_completed
+
+
+def test_move_removes_before_it_adds():
+    assert plan_steps((20, 7, MOVE, 21)) == (("DELETE", 20), ("PUT", 21))
+    assert plan_steps((20, 7, "PUT", None)) == (("PUT", 20),)
+    assert plan_steps((20, 7, "DELETE", None)) == (("DELETE", 20),)
+
+
+def test_skip_completed_leaves_the_unfinished_part_of_each_row():
+    items = [
+        (20, 1, "PUT", None),
+        (20, 2, "DELETE", None),
+        (20, 3, MOVE, 21),
+        (20, 4, MOVE, 21),
+        (20, 5, MOVE, 21),
+    ]
+    completed = {"PUT": {(20, "1"), (21, "3")}, "DELETE": {(20, "4")}}
+
+    assert list(skip_completed(items, completed)) == [
+        (20, 2, "DELETE", None),
+        (21, 4, "PUT", None),
+        (20, 5, MOVE, 21),
+    ]
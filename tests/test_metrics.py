@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from metrics import Histogram, RequestMetrics, RollingWindow  # noqa: E402
+
+
+def test_values_fall_into_the_first_bucket_at_or_above_them():
+    histogram = Histogram((0.1, 0.2, 0.4))
+    for value in (0.05, 0.1, 0.15, 0.3, 1.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.count == 5
+    assert histogram.sum == pytest.approx(1.6)
+
+
+def test_percentiles_interpolate_within_a_bucket():
+    histogram = Histogram((0.1, 0.2))
+    for _ in range(4):
+        histogram.observe(0.15)
+
+    assert histogram.percentile(0.5) == pytest.approx(0.15)
+    assert histogram.percentile(1.0) == pytest.approx(0.2)
+    assert Histogram().percentile(0.95) == 0.0
+
+
+def test_merged_histograms_add_up():
+    first, second = Histogram((0.1, 0.2)), Histogram((0.1, 0.2))
+    first.observe(0.05)
+    second.observe(0.15)
+    second.observe(0.5)
+
+    first.merge(second)
+
+    assert (first.counts, first.count) == ([1, 1, 1], 3)
+
+
+def test_rolling_rate_covers_only_the_time_since_the_first_sample():
+    window = RollingWindow(10)
+    for tick in range(20):
+        window.observe(0.1, 100.0 + tick * 0.1)
+
+    assert window.rate(102.0) == pytest.approx(10.0)
+    assert window.rate(130.0) == 0.0
+    assert RollingWindow(10).rate(100.0) == 0.0
+
+
+def test_rolling_rate_uses_the_full_window_once_it_has_passed():
+    window = RollingWindow(10)
+    for second in range(30):
+        window.observe(0.1, 100.0 + second)
+
+    assert window.rate(129.5) == pytest.approx(1.0)
+
+
+def test_prometheus_text_has_cumulative_buckets_and_status_counts():
+    metrics = RequestMetrics()
+    metrics.histograms = {"total": Histogram((0.1, 0.2))}
+    metrics.observe({"total": 0.05}, 200)
+    metrics.observe({"total": 0.15}, 200)
+    metrics.observe({"total": 0.5}, 429)
+
+    lines = metrics.to_prometheus().splitlines()
+
+    assert lines[:6] == [
+        "# TYPE sessionreg_request_total_seconds histogram",
+        'sessionreg_request_total_seconds_bucket{le="0.1"} 1',
+        'sessionreg_request_total_seconds_bucket{le="0.2"} 2',
+        'sessionreg_request_total_seconds_bucket{le="+Inf"} 3',
+        "sessionreg_request_total_seconds_sum 0.7",
+        "sessionreg_request_total_seconds_count 3",
+    ]
+    assert lines[6:] == [
+        "# TYPE sessionreg_responses_total counter",
+        'sessionreg_responses_total{status="200"} 2',
+        'sessionreg_responses_total{status="429"} 1',
+    ]
@@ -0,0 +1,82 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import rate_limiter
+from rate_limiter import FileTokenBucket, TokenBucket, rate_limiter_for
+
+
+def test_burst_is_free_then_callers_queue_for_refills():
+    bucket = TokenBucket(rate=10, burst=2)
+
+    waits = [bucket.reserve() for _ in range(4)]
+
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.02)
+    assert waits[3] == pytest.approx(0.2, abs=0.02)
+
+
+def test_refund_gives_back_an_unused_token():
+    bucket = TokenBucket(rate=0.001, burst=1)
+    bucket.reserve()
+
+    bucket.refund()
+
+    assert bucket.reserve() == 0.0
+    bucket.refund()
+    bucket.refund()
+    assert bucket.reserve() == 0.0 and bucket.reserve() > 0
+
+
+def test_acquire_sleeps_for_its_reservation():
+    bucket = TokenBucket(rate=50, burst=1)
+
+    async def acquire_two():
+        return await asyncio.gather(bucket.acquire(), bucket.acquire())
+
+    waits = asyncio.run(asyncio.wait_for(acquire_two(), 1))
+
+    assert waits[0] == 0.0 and waits[1] == pytest.approx(0.02, abs=0.01)
+
+
+def test_one_bucket_per_account(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_buckets", {})
+
+    first = rate_limiter_for("account", 5)
+    second = rate_limiter_for("account", 8)
+
+    assert first is second and first.rate == 8.0
+    assert rate_limiter_for("other", 5) is not first
+    assert rate_limiter_for("account", None) is None
+
+
+def reserve_from_file_bucket(path, start, count):
+    start.wait()
+    bucket = FileTokenBucket(path, rate=0.001, burst=3)
+    return [bucket.reserve() for _ in range(count)]
+
+
+@pytest.mark.skipif(rate_limiter.fcntl is None, reason="needs flock")
+def test_file_bucket_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "account.bucket")
+    context = multiprocessing.get_context("fork")
+
+    with context.Manager() as manager, ProcessPoolExecutor(max_workers=2, mp_context=context) as executor:
+        start = manager.Barrier(2)
+        futures = [executor.submit(reserve_from_file_bucket, path, start, 3) for _ in range(2)]
+        waits = [wait for future in futures for wait in future.result(timeout=10)]
+
+    # Both processes drew from one burst of three.
+    assert sorted(wait == 0.0 for wait in waits) == [False] * 3 + [True] * 3
+
+
+@pytest.mark.skipif(rate_limiter.fcntl is None, reason="needs flock")
+def test_file_bucket_refund(tmp_path):
+    bucket = FileTokenBucket(str(tmp_path / "account.bucket"), rate=0.001, burst=1)
+    bucket.reserve()
+
+    bucket.refund()
+
+    assert FileTokenBucket(bucket.path, rate=0.001, burst=1).reserve() == 0.0
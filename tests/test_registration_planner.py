@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from registration_planner import RegistrationPlanner  # noqa: E402
+
+
+class PageResponse:
+    status = 200
+    headers = {}
+
+    def __init__(self, data):
+        self.data = data
+
+    async def json(self, content_type=None):
+        return self.data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class PagedSession:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def get(self, url, headers, params):
+        return PageResponse(self.pages[params["page"]])
+
+
+class ClosedSession:
+    def get(self, url, headers, params):
+        raise RuntimeError("Session is closed")
+
+
+def fetch(planner, session):
+    return asyncio.run(planner.fetch_registrations(session, 20))
+
+
+@pytest.mark.parametrize("page_info", [None, "n/a", {}])
+def test_pages_without_page_info_end_on_a_short_page(page_info):
+    planner = RegistrationPlanner("token", "event", page_size=2)
+    session = PagedSession([{"content": [{"ticketId": 1}, {"ticketId": "2"}], "page": page_info},
+                            {"content": [{"id": 3}, "junk"], "page": page_info},
+                            {"content": None, "page": page_info}])
+
+    assert fetch(planner, session) == {1, 2, 3}
+
+
+def test_closed_session_gives_up_without_retrying():
+    planner = RegistrationPlanner("token", "event")
+
+    assert fetch(planner, ClosedSession()) is None
+
+
+def test_cancelled_planner_stops_fetching():
+    planner = RegistrationPlanner("token", "event", cancelled=lambda: True)
+
+    assert fetch(planner, PagedSession([])) is None
+
+
+def test_plan_against_the_mock_api():
+    pytest.importorskip("aiohttp.web")
+    from mock_api import MockBizzaboAPI
+    from transport import HttpTransport
+
+    api = MockBizzaboAPI()
+    api.registrations[("event", 20)] = {1, 2, 3}
+    api.registrations[("event", 21)] = {7}
+    transport = HttpTransport()
+    try:
+        base_url = transport.run(api.start())
+        planner = RegistrationPlanner("token", "event", api_base_url=base_url, page_size=2, transport=transport)
+        data = {20: [1, 2, 4, 5], 21: [7, 8], 22: [9]}
+
+        assert planner.plan(data, "PUT") == {20: [4, 5], 21: [8], 22: [9]}
+        assert planner.skipped == 3
+        assert planner.plan(data, "DELETE") == {20: [1, 2], 21: [7]}
+    finally:
+        transport.run(api.stop())
+        transport.close()
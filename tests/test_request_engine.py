@@ -0,0 +1,256 @@
+import asyncio
+import concurrent.futures
+import random
+import threading
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from credential_pool import Credential, CredentialPool  # noqa: E402
+from job_plan import PLAN, PlanItems  # noqa: E402
+from rate_limiter import TokenBucket  # noqa: E402
+from request_engine import RequestEngine  # noqa: E402
+from resume_journal import ResumeJournal  # noqa: E402
+from retry_policy import RetryPolicy  # noqa: E402
+from work_feed import WorkFeed  # noqa: E402
+
+
+class FakeContent:
+    def __init__(self, body: bytes, chunk_size: int = None):
+        self.body = body
+        self.chunk_size = chunk_size
+
+    async def read(self, size: int = -1) -> bytes:
+        if self.chunk_size is not None:
+            size = self.chunk_size if size < 0 else min(size, self.chunk_size)
+        chunk, self.body = (self.body, b"") if size < 0 else (self.body[:size], self.body[size:])
+        return chunk
+
+    async def readany(self) -> bytes:
+        return await self.read(self.chunk_size or 1024)
+
+
+class FakeResponse:
+    def __init__(self, status: int, body: bytes = b"", chunk_size: int = None):
+        self.status = status
+        self.headers = {}
+        self.charset = None
+        self.content = FakeContent(body, chunk_size)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class FakeRequest:
+    def __init__(self, session, method, url, headers):
+        self.session = session
+        self.method = method
+        self.url = url
+        self.token = headers["Authorization"].partition(" ")[2]
+
+    async def __aenter__(self):
+        self.session.started += 1
+        await asyncio.sleep(random.uniform(0, self.session.latency))
+        self.session.sent.append((self.method, self.url))
+        self.session.on_response(self.session)
+        if self.token in self.session.rejected_tokens:
+            return FakeResponse(401)
+        return FakeResponse(self.session.status_for(self.method, self.url))
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class FakeSession:
+    def __init__(self, status_for=lambda method, url: 200, rejected_tokens=(), latency=0.003,
+                 on_response=lambda session: None):
+        self.status_for = status_for
+        self.rejected_tokens = rejected_tokens
+        self.latency = latency
+        self.on_response = on_response
+        self.started = 0
+        self.sent = []
+        self.engine = None
+
+    def put(self, url, headers, **kwargs):
+        return FakeRequest(self, "PUT", url, headers)
+
+    def delete(self, url, headers, **kwargs):
+        return FakeRequest(self, "DELETE", url, headers)
+
+
+class FailingTokenSource:
+    client_id = "client"
+
+    def __init__(self, refreshed_token=None):
+        self.refreshed_token = refreshed_token
+        self.refreshes = 0
+
+    def get(self):
+        return "stale"
+
+    def refresh(self, stale_token):
+        self.refreshes += 1
+        if self.refreshed_token is None:
+            raise ConnectionError("token endpoint unreachable")
+        return self.refreshed_token
+
+    def expires_soon(self):
+        return True
+
+
+class FakeTransport:
+    def __init__(self, session):
+        self.session = session
+
+    def submit(self, coro):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(asyncio.run(coro))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+    async def get_session(self, concurrency):
+        return self.session
+
+
+def format_link(session_id, ticket_id):
+    return f"{session_id}/{ticket_id}"
+
+
+def run_engine(work_items, request_method="PUT", session=None, format_link=format_link, **options):
+    session = session or FakeSession()
+    engine = RequestEngine("token", work_items, format_link,
+                           request_method=request_method, transport=FakeTransport(session),
+                           retry_policy=RetryPolicy(max_attempts={}), **options)
+    session.engine = engine
+    engine.run()
+    return engine, session.sent
+
+
+def test_plan_rows_for_a_ticket_run_in_input_order():
+    tickets = range(1, 101)
+    plan = PlanItems([(20, ticket_id, "PUT", None) for ticket_id in tickets] +
+                     [(20, ticket_id, "MOVE", 21) for ticket_id in tickets] +
+                     [(21, ticket_id, "DELETE", None) for ticket_id in tickets[::2]])
+
+    engine, sent = run_engine(plan, PLAN, max_concurrent_requests=16)
+
+    assert engine.completed_requests == len(plan)
+    for ticket_id in tickets:
+        expected = [("PUT", f"20/{ticket_id}"), ("DELETE", f"20/{ticket_id}"), ("PUT", f"21/{ticket_id}")]
+        if ticket_id % 2:
+            expected.append(("DELETE", f"21/{ticket_id}"))
+        assert [request for request in sent if request[1].endswith(f"/{ticket_id}")] == expected
+
+
+def test_failed_row_does_not_stop_later_rows_for_the_ticket():
+    plan = PlanItems([(20, 7, "PUT", None), (20, 7, "DELETE", None), (20, 7, "PUT", None)])
+    statuses = iter([500, 200, 200])
+    session = FakeSession(lambda method, url: next(statuses))
+
+    engine, sent = run_engine(plan, PLAN, session=session, max_concurrent_requests=4)
+
+    assert sent == [("PUT", "20/7"), ("DELETE", "20/7"), ("PUT", "20/7")]
+    assert engine.failed_requests.count == 1
+
+
+@pytest.mark.parametrize("refreshed_token", [None, ""])
+def test_failed_token_refresh_fails_the_request_and_backs_off(refreshed_token):
+    token_source = FailingTokenSource(refreshed_token)
+    credentials = CredentialPool([Credential(token_source)])
+    work_items = [(20, ticket_id) for ticket_id in range(50)]
+
+    engine, sent = run_engine(work_items, session=FakeSession(rejected_tokens={"stale"}), credentials=credentials,
+                              max_concurrent_requests=8)
+
+    assert engine.completed_requests == len(work_items)
+    assert engine.failed_requests.status_counts == {401: len(work_items)}
+    assert token_source.refreshes == 1
+
+
+def test_unexpected_error_fails_only_its_request():
+    def broken_link(session_id, ticket_id):
+        if ticket_id == 3:
+            raise KeyError(ticket_id)
+        return format_link(session_id, ticket_id)
+
+    engine, sent = run_engine([(20, ticket_id) for ticket_id in range(10)], format_link=broken_link,
+                              max_concurrent_requests=4)
+
+    assert engine.completed_requests == 10
+    assert len(sent) == 9
+    assert engine.failed_requests.status_counts == {0: 1}
+
+
+@pytest.mark.parametrize("options", [
+    {"adaptive_concurrency": True, "max_concurrent_requests": 2},
+    {"rate_limiter": TokenBucket(50, 1), "max_concurrent_requests": 8},
+])
+def test_no_request_starts_after_cancel_for_workers_waiting_on_a_limiter(options):
+    def cancel_on_fourth_response(session):
+        if len(session.sent) == 4:
+            session.engine.cancel()
+            session.started_at_cancel = session.started
+
+    session = FakeSession(latency=0.01, on_response=cancel_on_fourth_response)
+
+    engine, sent = run_engine([(20, ticket_id) for ticket_id in range(200)], session=session, **options)
+
+    assert session.started == session.started_at_cancel
+    assert engine.completed_requests < 200
+
+
+@pytest.mark.parametrize("options", [
+    {"adaptive_concurrency": True, "max_concurrent_requests": 2},
+    {"rate_limiter": TokenBucket(50, 1), "max_concurrent_requests": 8},
+])
+def test_no_request_starts_while_paused_for_workers_waiting_on_a_limiter(options):
+    pauses = []
+
+    def pause_on_fourth_response(session):
+        if len(session.sent) == 4:
+            session.engine.pause()
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, lambda: pauses.append(session.started))
+            loop.call_later(0.3, lambda: (pauses.append(session.started), session.engine.resume()))
+
+    session = FakeSession(latency=0.01, on_response=pause_on_fourth_response)
+
+    engine, sent = run_engine([(20, ticket_id) for ticket_id in range(40)], session=session, **options)
+
+    assert pauses[0] == pauses[1]
+    assert engine.completed_requests == 40
+
+
+def test_token_endpoint_error_fails_the_run_and_closes_the_feed():
+    class UnreachableTokenSource(FailingTokenSource):
+        def get(self):
+            raise ConnectionError("token endpoint unreachable")
+
+    feed = WorkFeed(max_pending=1)
+    producer = threading.Thread(target=lambda: [feed.put([(20, ticket_id)]) for ticket_id in range(10)])
+    producer.start()
+    credentials = CredentialPool([Credential(UnreachableTokenSource())])
+
+    engine, sent = run_engine(feed, credentials=credentials)
+    producer.join(timeout=5)
+
+    assert engine.error.startswith("Failed to obtain access token")
+    assert feed.closed and not producer.is_alive()
+    assert sent == []
+
+
+@pytest.mark.parametrize("status, kept", [(200, False), (500, True)])
+def test_journal_is_removed_only_after_a_complete_run(tmp_path, status, kept):
+    journal = ResumeJournal(str(tmp_path / "input.journal"))
+
+    run_engine([(20, ticket_id) for ticket_id in range(5)], session=FakeSession(lambda method, url: status),
+               journal=journal)
+
+    assert (tmp_path / "input.journal").exists() == kept
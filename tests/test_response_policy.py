@@ -0,0 +1,56 @@
+import asyncio
+
+from response_policy import ResponsePolicy
+
+
+class ChunkedContent:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    async def read(self, size: int = -1) -> bytes:
+        if not self.chunks:
+            return b""
+        chunk = self.chunks.pop(0)
+        if 0 <= size < len(chunk):
+            self.chunks.insert(0, chunk[size:])
+            chunk = chunk[:size]
+        return chunk
+
+    async def readany(self) -> bytes:
+        return await self.read()
+
+
+class ChunkedResponse:
+    charset = None
+
+    def __init__(self, status, chunks):
+        self.status = status
+        self.content = ChunkedContent(chunks)
+
+
+def read(policy, response):
+    return asyncio.run(policy.read(response))
+
+
+def test_error_body_in_several_chunks_is_read_whole():
+    policy = ResponsePolicy()
+    response = ChunkedResponse(409, [b'{"errorCode": "ALREADY_', b'REGISTERED", "message": "x"}'])
+
+    body = read(policy, response)
+
+    assert policy.classify(409, body) == "conflict:ALREADY_REGISTERED"
+
+
+def test_error_body_is_cut_at_max_error_bytes_and_the_rest_drained():
+    policy = ResponsePolicy(max_error_bytes=10)
+    response = ChunkedResponse(500, [b"0123456", b"789abc", b"def"])
+
+    assert read(policy, response) == "0123456789"
+    assert response.content.chunks == []
+
+
+def test_successful_body_is_drained_without_decoding():
+    response = ChunkedResponse(200, [b"{}", b"ok"])
+
+    assert read(ResponsePolicy(), response) == ""
+    assert response.content.chunks == []
@@ -0,0 +1,46 @@
+from resume_journal import ResumeJournal
+
+
+def test_torn_last_line_is_skipped_and_terminated(tmp_path):
+    path = str(tmp_path / "input.csv.event.put.journal")
+    with open(path, "w", encoding="utf-8") as journal_file:
+        journal_file.write("PUT\t20\t1\t200\nPUT\t20\t2\t500\nPUT\t20\t3\t2")
+
+    assert ResumeJournal.load_completed(path, "PUT") == {(20, "1")}
+
+    journal = ResumeJournal(path)
+    journal.record("PUT", 20, 4, 201)
+    journal.close()
+
+    assert ResumeJournal.load_completed(path, "PUT") == {(20, "1"), (20, "4")}
+
+
+def test_completed_keys_are_per_method(tmp_path):
+    path = str(tmp_path / "plan.journal")
+    journal = ResumeJournal(path, append=False)
+    journal.record("PUT", 21, "0012", 200)
+    journal.record("DELETE", 20, "0012", 204)
+    journal.close()
+
+    assert ResumeJournal.load_completed(path, "PUT") == {(21, "0012")}
+    assert ResumeJournal.load_completed(path, "DELETE") == {(20, "0012")}
+
+
+def test_journals_go_to_the_journal_dir_keyed_by_the_input_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("SESSIONREG_JOURNAL_DIR", str(tmp_path / "journals"))
+
+    first = ResumeJournal.path_for("/share/a/input.csv", "event", "PUT")
+    second = ResumeJournal.path_for("/share/b/input.csv", "event", "PUT")
+
+    assert first != second
+    assert all(path.startswith(str(tmp_path / "journals")) and path.endswith(".event.put.journal")
+               for path in (first, second))
+
+
+def test_discard_removes_the_journal(tmp_path):
+    journal = ResumeJournal(str(tmp_path / "done.journal"))
+    journal.record("PUT", 20, 1, 200)
+    journal.close()
+    journal.discard()
+
+    assert not (tmp_path / "done.journal").exists()
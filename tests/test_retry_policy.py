@@ -0,0 +1,39 @@
+import time
+from email.utils import formatdate
+
+from retry_policy import RetryPolicy
+
+
+def test_attempts_by_status_and_class():
+    policy = RetryPolicy({429: 6, "5xx": 3})
+
+    assert policy.attempts_for(429) == 6
+    assert policy.attempts_for(503) == 3
+    assert policy.attempts_for(404) == 1
+
+
+def test_retry_after_seconds_is_used_as_the_delay():
+    policy = RetryPolicy({429: 3})
+
+    assert policy.next_delay(429, 1, 0.0, "7") == 7.0
+    assert policy.next_delay(429, 3, 0.0, "7") is None
+    assert policy.next_delay(404, 1, 0.0, "7") is None
+
+
+def test_retry_after_http_date():
+    delay = RetryPolicy({429: 3}).next_delay(429, 1, 0.0, formatdate(time.time() + 30, usegmt=True))
+
+    assert 25 <= delay <= 30
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy({0: 10}, base_delay=1.0, max_delay=4.0)
+
+    assert all(0 <= policy.next_delay(0, attempt, 0.0) <= min(4.0, 2 ** (attempt - 1)) for attempt in range(1, 10))
+
+
+def test_no_retry_past_the_total_delay():
+    policy = RetryPolicy({429: 5}, max_total_delay=60.0)
+
+    assert policy.next_delay(429, 1, 50.0, "5") == 5.0
+    assert policy.next_delay(429, 1, 50.0, "15") is None
@@ -0,0 +1,62 @@
+import asyncio
+
+from data_processor import WorkItems
+from job_plan import PlanItems
+from scheduler import FairScheduler
+
+
+def drain(scheduler, release=False):
+    async def take_all():
+        items = []
+        while True:
+            item = await scheduler.next_item()
+            if item is None:
+                return items
+            items.append(item)
+            if release:
+                scheduler.release(item[0])
+    return asyncio.run(take_all())
+
+
+def test_sessions_take_turns():
+    items = WorkItems([(1, 10), (1, 11), (1, 12), (2, 20), (3, 30), (3, 31)])
+
+    assert drain(FairScheduler(items)) == [(1, 10), (2, 20), (3, 30), (1, 11), (3, 31), (1, 12)]
+
+
+def test_session_at_its_limit_waits_for_a_release():
+    async def run():
+        scheduler = FairScheduler(WorkItems([(1, 10), (1, 11), (2, 20), (2, 21)]), per_session_limit=1)
+        first = [await scheduler.next_item(), await scheduler.next_item()]
+        waiting = asyncio.create_task(scheduler.next_item())
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        scheduler.release(2)
+        return first, await waiting
+
+    assert asyncio.run(run()) == ([(1, 10), (2, 20)], (2, 21))
+
+
+def test_streamed_items_join_the_rotation():
+    async def run():
+        scheduler = FairScheduler(WorkItems(), input_finished=False)
+        scheduler.add_pairs([(1, 10), (1, 11)])
+        taken = [await scheduler.next_item()]
+        scheduler.add_pairs([(2, 20), (1, 12)])
+        scheduler.finish_input()
+        while True:
+            item = await scheduler.next_item()
+            if item is None:
+                return taken
+            taken.append(item)
+
+    assert asyncio.run(run()) == [(1, 10), (1, 11), (2, 20), (1, 12)]
+
+
+def test_plan_items_for_a_ticket_keep_input_order_across_sessions():
+    items = PlanItems([(1, 10, "PUT", None), (1, 11, "PUT", None), (1, 7, "MOVE", 2), (2, 7, "DELETE", None)])
+
+    taken = drain(FairScheduler(items, ticket_order=True))
+
+    assert taken == [(1, 10, "PUT", None), (1, 11, "PUT", None), (1, 7, "MOVE", 2), (2, 7, "DELETE", None)]
+    assert drain(FairScheduler(PlanItems(items)))[1] == (2, 7, "DELETE", None)
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from credential_pool import credential_pool_for
+from token_provider import TokenManager, TokenProvider
+
+
+def test_tokens_for_different_clients_are_fetched_in_parallel(monkeypatch):
+    both_fetching = threading.Barrier(2, timeout=5)
+
+    def fetch_access_token(client_id, client_secret, account_id, url=None):
+        both_fetching.wait()
+        return f"token-{client_id}", 3600
+
+    monkeypatch.setattr(TokenProvider, "fetch_access_token", staticmethod(fetch_access_token))
+    pool = credential_pool_for(TokenManager(), [("a", "secret"), ("b", "secret")], "account")
+
+    assert pool.fetch_tokens()
+    assert [credential.access_token for credential in pool.credentials] == ["token-a", "token-b"]
+
+
+def test_concurrent_refreshes_of_one_client_fetch_once(monkeypatch):
+    fetches = []
+
+    def fetch_access_token(client_id, client_secret, account_id, url=None):
+        fetches.append(client_id)
+        time.sleep(0.05)
+        return f"token-{len(fetches)}", 3600
+
+    monkeypatch.setattr(TokenProvider, "fetch_access_token", staticmethod(fetch_access_token))
+    source = TokenManager().source("a", "secret", "account")
+    stale_token = source.get()
+    threads = [threading.Thread(target=source.refresh, args=(stale_token,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fetches == ["a", "a"]
+    assert source.get() == "token-2"
+
+
+def test_client_that_cannot_authenticate_is_left_out(monkeypatch):
+    def fetch_access_token(client_id, client_secret, account_id, url=None):
+        if client_id == "unreachable":
+            raise ConnectionError("connection refused")
+        if client_id == "rejected":
+            return "", None
+        return f"token-{client_id}", 3600
+
+    monkeypatch.setattr(TokenProvider, "fetch_access_token", staticmethod(fetch_access_token))
+    pool = credential_pool_for(TokenManager(), [("a", "s"), ("unreachable", "s"), ("rejected", "s")], "account")
+
+    assert pool.fetch_tokens()
+    assert [credential.name for credential in pool.credentials] == ["a"]
+    assert pool.unavailable == [("unreachable", "ConnectionError: connection refused"),
+                                ("rejected", "authentication failed")]
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+from work_feed import WorkFeed
+
+
+def produce(feed, batches, results):
+    for batch in batches:
+        results.append(feed.put(batch))
+        if not results[-1]:
+            return
+
+
+def test_batches_arrive_in_order_until_finished():
+    feed = WorkFeed()
+
+    def read_input():
+        produce(feed, [[(20, 1)], [(21, 2)]], [])
+        feed.finish()
+
+    producer = threading.Thread(target=read_input)
+
+    async def consume():
+        producer.start()
+        batches = []
+        while (batch := await asyncio.wait_for(feed.get_batch(), 1)) is not None:
+            batches.append(batch)
+        return batches
+
+    assert asyncio.run(consume()) == [[(20, 1)], [(21, 2)]]
+    assert feed.total == 2 and feed.error is None
+
+
+def test_close_releases_a_blocked_producer():
+    feed = WorkFeed(max_pending=1)
+    results = []
+    producer = threading.Thread(target=produce, args=(feed, [[(20, 1)], [(21, 2)], [(22, 3)]], results))
+    producer.start()
+    producer.join(0.2)
+    assert producer.is_alive() and results == [True]
+
+    feed.close()
+    producer.join(1)
+
+    assert not producer.is_alive()
+    assert results == [True, False]
+    assert asyncio.run(feed.get_batch()) is None
+
+
+def test_close_wakes_a_waiting_consumer():
+    feed = WorkFeed()
+
+    async def cancel_while_waiting():
+        waiting = asyncio.ensure_future(feed.get_batch())
+        await asyncio.sleep(0)
+        threading.Thread(target=feed.close).start()
+        return await asyncio.wait_for(waiting, 1)
+
+    assert asyncio.run(cancel_while_waiting()) is None
+    assert not feed.put([(20, 1)])
+
+
+def test_finish_passes_on_the_read_error():
+    feed = WorkFeed()
+    feed.put([(20, 1)])
+    feed.finish("Could not read input.csv")
+
+    async def consume():
+        return await feed.get_batch(), await feed.get_batch()
+
+    assert asyncio.run(consume()) == ([(20, 1)], None)
+    assert feed.error == "Could not read input.csv"
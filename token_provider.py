@@ -1,27 +1,108 @@
-import requests
-
-
-class TokenProvider:
-    @staticmethod
-    def get_access_token(client_id: str, client_secret: str, account_id: str) -> str:
-        url = 'https://auth.bizzabo.com/oauth/token'
-
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-
-        payload = {
-            'grant_type': 'client_credentials',
-            'client_id': client_id,
-            'client_secret': client_secret,
-            'audience': 'https://api.bizzabo.com/api',
-            'account_id': account_id
-        }
-
-        response = requests.post(url, headers=headers, data=payload)
-
-        if response.status_code == 200:
-            access_token = response.json()['access_token']
-            return access_token
-        else:
-            return ''
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+AUTH_URL = 'https://auth.bizzabo.com/oauth/token'
+
+# (connect, read) seconds. A hung token request would otherwise hold up every
+# request waiting on the refresh; a timeout fails it like any other refresh error.
+AUTH_TIMEOUT = (10.0, 30.0)
+
+
+class TokenProvider:
+    @staticmethod
+    def get_access_token(client_id: str, client_secret: str, account_id: str) -> str:
+        access_token, _ = TokenProvider.fetch_access_token(client_id, client_secret, account_id)
+        return access_token
+
+    @staticmethod
+    def fetch_access_token(client_id: str, client_secret: str, account_id: str,
+                           url: str = AUTH_URL,
+                           timeout: Tuple[float, float] = AUTH_TIMEOUT) -> Tuple[str, Optional[float]]:
+        import requests
+
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+
+        payload = {
+            'grant_type': 'client_credentials',
+            'client_id': client_id,
+            'client_secret': client_secret,
+            'audience': 'https://api.bizzabo.com/api',
+            'account_id': account_id
+        }
+
+        response = requests.post(url, headers=headers, data=payload, timeout=timeout)
+
+        if response.status_code == 200:
+            response_json = response.json()
+            return response_json['access_token'], response_json.get('expires_in')
+        else:
+            return '', None
+
+
+class TokenManager:
+    def __init__(self, refresh_margin: float = 300.0, auth_url: str = AUTH_URL):
+        self.refresh_margin = refresh_margin
+        self.auth_url = auth_url
+        self._tokens: Dict[Tuple[str, str], Tuple[str, Optional[float]]] = {}
+        # One lock per client, so different clients fetch and refresh their tokens
+        # in parallel.
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, client_id: str, account_id: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault((client_id, account_id), threading.Lock())
+
+    def get_access_token(self, client_id: str, client_secret: str, account_id: str) -> str:
+        with self._lock(client_id, account_id):
+            cached = self._tokens.get((client_id, account_id))
+            if cached is not None and not self._expires_soon(cached[1]):
+                return cached[0]
+            return self._fetch(client_id, client_secret, account_id)
+
+    def refresh_access_token(self, client_id: str, client_secret: str, account_id: str, stale_token: str) -> str:
+        # Callers that saw the same stale token queue up on the client's lock; only the
+        # first one goes to the OAuth endpoint, the rest pick up the token it cached.
+        with self._lock(client_id, account_id):
+            cached = self._tokens.get((client_id, account_id))
+            if cached is not None and cached[0] != stale_token and not self._expires_soon(cached[1]):
+                return cached[0]
+            return self._fetch(client_id, client_secret, account_id)
+
+    def expires_soon(self, client_id: str, account_id: str) -> bool:
+        cached = self._tokens.get((client_id, account_id))
+        return cached is not None and self._expires_soon(cached[1])
+
+    def source(self, client_id: str, client_secret: str, account_id: str) -> 'TokenSource':
+        return TokenSource(self, client_id, client_secret, account_id)
+
+    def _fetch(self, client_id: str, client_secret: str, account_id: str) -> str:
+        access_token, expires_in = TokenProvider.fetch_access_token(client_id, client_secret, account_id,
+                                                                    url=self.auth_url)
+        if access_token:
+            expires_at = time.monotonic() + float(expires_in) if expires_in else None
+            self._tokens[(client_id, account_id)] = (access_token, expires_at)
+        return access_token
+
+    def _expires_soon(self, expires_at: Optional[float]) -> bool:
+        return expires_at is not None and expires_at - self.refresh_margin <= time.monotonic()
+
+
+class TokenSource:
+    def __init__(self, manager: TokenManager, client_id: str, client_secret: str, account_id: str):
+        self.manager = manager
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.account_id = account_id
+
+    def get(self) -> str:
+        return self.manager.get_access_token(self.client_id, self.client_secret, self.account_id)
+
+    def refresh(self, stale_token: str) -> str:
+        return self.manager.refresh_access_token(self.client_id, self.client_secret, self.account_id, stale_token)
+
+    def expires_soon(self) -> bool:
+        return self.manager.expires_soon(self.client_id, self.account_id)
@@ -0,0 +1,103 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Dict, List
+
+import aiohttp
+
+from metrics import request_timing_trace_config
+
+
+class HttpTransport:
+    def __init__(self, limit_per_host: int = 25, ttl_dns_cache: int = 300, keepalive_timeout: float = 60.0,
+                 reuse_connector: bool = True, trace_configs: List[aiohttp.TraceConfig] = None):
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.reuse_connector = reuse_connector
+        self.trace_configs = trace_configs or []
+
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._connector_limit = 0
+        self._created_connections = 0
+        self._reused_connections = 0
+        self._lock = threading.Lock()
+
+    def run(self, coro):
+        return self.submit(coro).result()
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        # Jobs run on one long-lived loop so the session, its warm keep-alive
+        # connections and DNS cache outlive any single RequestThread.
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    async def get_session(self, concurrency: int) -> aiohttp.ClientSession:
+        if self._session is not None and (not self.reuse_connector or concurrency > self._connector_limit):
+            await self._session.close()
+            self._session = None
+
+        if self._session is None:
+            self._connector_limit = max(concurrency, self.limit_per_host)
+            connector = aiohttp.TCPConnector(limit=self._connector_limit,
+                                             limit_per_host=self._connector_limit,
+                                             ttl_dns_cache=self.ttl_dns_cache,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  trace_configs=[self._trace_config(), request_timing_trace_config()] +
+                                                  self.trace_configs)
+        return self._session
+
+    def stats(self) -> Dict[str, int]:
+        if self._loop is None:
+            return self._collect_stats()
+        return asyncio.run_coroutine_threadsafe(self._async_stats(), self._loop).result()
+
+    def close(self):
+        with self._lock:
+            if self._loop is None:
+                return
+            if self._session is not None:
+                asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+                self._session = None
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+            self._thread = None
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="http-transport", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_created)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+        return trace_config
+
+    async def _on_connection_created(self, session, trace_config_ctx, params):
+        self._created_connections += 1
+
+    async def _on_connection_reused(self, session, trace_config_ctx, params):
+        self._reused_connections += 1
+
+    async def _async_stats(self) -> Dict[str, int]:
+        return self._collect_stats()
+
+    def _collect_stats(self) -> Dict[str, int]:
+        connector = self._session.connector if self._session is not None else None
+        idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        in_use = len(getattr(connector, "_acquired", ()))
+        return {
+            "open": idle + in_use,
+            "idle": idle,
+            "in_use": in_use,
+            "created": self._created_connections,
+            "reused": self._reused_connections,
+        }
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from collections import deque
+from typing import List, Optional, Tuple
+
+from input_readers import TicketId
+
+
+class WorkFeed:
+    # Thread-safe hand-off of work item batches from a producer thread reading the
+    # input to the engine's event loop, so dispatch can start with the first rows.
+    # The producer blocks once max_pending batches are waiting.
+    def __init__(self, max_pending: int = 50):
+        self.max_pending = max_pending
+        self.total = 0
+        self.finished = False
+        self.closed = False
+        self.error = None
+        self._batches = deque()
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._loop = None
+        self._ready = None
+
+    def put(self, batch: List[Tuple[int, TicketId]]) -> bool:
+        # Returns False once the consumer has closed the feed; the producer should stop.
+        with self._space:
+            self._space.wait_for(lambda: self.closed or len(self._batches) < self.max_pending)
+            if self.closed:
+                return False
+            self._batches.append(batch)
+            self.total += len(batch)
+        self._wake()
+        return True
+
+    def finish(self, error: str = None):
+        with self._lock:
+            self.finished = True
+            self.error = error
+        self._wake()
+
+    def close(self):
+        with self._space:
+            self.closed = True
+            self._batches.clear()
+            self._space.notify_all()
+        self._wake()
+
+    async def get_batch(self) -> Optional[List[Tuple[int, TicketId]]]:
+        if self._ready is None:
+            self._ready = asyncio.Event()
+            self._loop = asyncio.get_running_loop()
+        while True:
+            with self._space:
+                if self._batches:
+                    batch = self._batches.popleft()
+                    self._space.notify()
+                    return batch
+                if self.finished or self.closed:
+                    return None
+                self._ready.clear()
+            await self._ready.wait()
+
+    def _wake(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._ready.set)